@@ -0,0 +1,147 @@
+# pty-backed fake HP 7475A for exercising the serial code without hardware
+import os
+import pty
+import select
+import threading
+import time
+import tty
+
+XON = b'\x11'
+XOFF = b'\x13'
+
+
+class FakePlotter:
+    """Simulated plotter on a pseudo-terminal.
+
+    Open `port` with pyserial like a real device. Bytes are taken off the line at
+    baud_rate / 10 bytes per second (nothing is read while XOFF is in effect, as a
+    UART would hold queued bytes) and HPGL is appended to a buffer of buffer_size
+    bytes that drains at drain_rate bytes per second.
+    ESC.B / ESC.L are answered with the free / total buffer space, ESC.K empties
+    the buffer, ESC.I / ESC.N switch on Xon-Xoff handshaking, and bytes that arrive while the buffer is full
+    are counted in `overflows` (a real plotter would drop them).
+    """
+
+    def __init__(self, buffer_size=1024, drain_rate=200.0, baud_rate=9600, xoff_threshold=81):
+        self.buffer_size = buffer_size
+        self.line_rate = baud_rate / 10  # 8N1: ten bits per byte
+        self.drain_rate = drain_rate
+        self.xoff_threshold = xoff_threshold
+        self.received = bytearray()  # HPGL accepted into the buffer, escapes removed
+        self.overflows = 0
+        self.aborts = 0
+        self.xoffs = 0  # XOFF / XON characters sent to pause and resume the sender
+        self.xons = 0
+        self.xonxoff = False
+        self._fill = 0.0
+        self._paused_sender = False
+        self._pending = bytearray()
+        self._lock = threading.Lock()
+        self._running = True
+
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._last = time.monotonic()
+        self._line_allowance = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def free_space(self):
+        with self._lock:
+            self._drain()
+            return self.buffer_size - int(self._fill)
+
+    def _drain(self):
+        now = time.monotonic()
+        self._fill = max(0.0, self._fill - (now - self._last) * self.drain_rate)
+        self._last = now
+
+    def _reply(self, data):
+        os.write(self._master, data)
+
+    def _handle(self, data):
+        self._pending += data
+        while self._pending:
+            if self._pending[:1] == b'\x1b':
+                if len(self._pending) < 3:
+                    return  # Wait for the rest of the escape sequence
+                code = self._pending[2:3]
+                if code in (b'B', b'L', b'O', b'E', b'K', b'J'):
+                    self._pending = self._pending[3:]
+                    if code == b'K':
+                        self._fill = 0.0  # Abort graphic: discard buffered HPGL
+                        self.aborts += 1
+                    elif code == b'J':
+                        pass
+                    elif code == b'B':
+                        self._reply(f"{self.buffer_size - int(self._fill)}\r".encode())
+                    elif code == b'L':
+                        self._reply(f"{self.buffer_size}\r".encode())
+                    else:
+                        self._reply(b"0\r")
+                    continue
+                end = self._pending.find(b':')
+                if end < 0:
+                    return
+                if code in (b'I', b'N'):
+                    self.xonxoff = True
+                self._pending = self._pending[end + 1:]
+                continue
+
+            # Plain HPGL bytes go into the buffer up to the next escape
+            end = self._pending.find(b'\x1b')
+            chunk = self._pending if end < 0 else self._pending[:end]
+            self._pending = self._pending[len(chunk):]
+            room = self.buffer_size - int(self._fill)
+            accepted = chunk[:max(room, 0)]
+            self.overflows += len(chunk) - len(accepted)
+            self._fill += len(accepted)
+            self.received += accepted
+
+    def _run(self):
+        last_tick = time.monotonic()
+        while self._running:
+            readable, _, _ = select.select([self._master], [], [], 0.005)
+            with self._lock:
+                self._drain()
+                now = time.monotonic()
+                # An idle line does not bank bytes; allow at most a UART FIFO's worth of burst
+                self._line_allowance = min(self._line_allowance + (now - last_tick) * self.line_rate,
+                                           max(16.0, self.line_rate * 0.01))
+                last_tick = now
+                if readable and not self._paused_sender and self._line_allowance >= 1:
+                    try:
+                        data = os.read(self._master, min(int(self._line_allowance), 16))
+                    except OSError:
+                        break
+                    self._line_allowance -= len(data)
+                    self._handle(data)
+                if self.xonxoff:
+                    free = self.buffer_size - int(self._fill)
+                    if not self._paused_sender and free < self.xoff_threshold:
+                        self._reply(XOFF)
+                        self._paused_sender = True
+                        self.xoffs += 1
+                    elif self._paused_sender and free >= self.xoff_threshold:
+                        self._reply(XON)
+                        self._paused_sender = False
+                        self.xons += 1
+
+    def wait_until_idle(self, timeout=10.0):
+        """Block until the line is quiet and the buffer has drained (plot finished)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            line_busy = select.select([self._master], [], [], 0)[0]
+            if not line_busy and self.free_space >= self.buffer_size:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=1)
+        os.close(self._master)
+        os.close(self._slave)
@@ -0,0 +1,95 @@
+# Tolerance-based flattening of svg.path segments into polylines
+import math
+
+import numpy as np
+from svg.path import Arc, Close, CubicBezier, Line, Move, QuadraticBezier
+
+# Default maximum chord error in plotter units (1 unit = 0.025 mm)
+FLATTEN_TOLERANCE = 2.0
+
+
+def _bezier_steps(controls, tolerance):
+    """Uniform steps needed so the chord error of a Bézier stays below tolerance.
+
+    Uses the bound error <= d(d-1)/8 * max|P[i+2] - 2P[i+1] + P[i]| / n^2.
+    """
+    degree = len(controls) - 1
+    second_differences = controls[2:] - 2 * controls[1:-1] + controls[:-2]
+    bound = degree * (degree - 1) / 8 * np.abs(second_differences).max()
+    if bound <= tolerance:
+        return 1
+    return math.ceil(math.sqrt(bound / tolerance))
+
+
+def _bezier_points(controls, steps):
+    """Evaluate a Bézier (complex control points) at steps + 1 uniform t values."""
+    t = np.linspace(0, 1, steps + 1)
+    if len(controls) == 3:
+        p0, p1, p2 = controls
+        points = (1 - t) ** 2 * p0 + 2 * (1 - t) * t * p1 + t ** 2 * p2
+    else:
+        p0, p1, p2, p3 = controls
+        points = ((1 - t) ** 3 * p0 + 3 * (1 - t) ** 2 * t * p1
+                  + 3 * (1 - t) * t ** 2 * p2 + t ** 3 * p3)
+    return points
+
+
+def flatten_segment(segment, tolerance):
+    """Return segment as an (n, 2) array of points, start included.
+
+    Lines produce just their two endpoints; curves and arcs are subdivided until
+    the chord error is below tolerance (in the segment's own units).
+    """
+    if isinstance(segment, Move):
+        return np.empty((0, 2))
+
+    if isinstance(segment, (Line, Close)):
+        points = np.array([segment.start, segment.end])
+
+    elif isinstance(segment, QuadraticBezier):
+        controls = np.array([segment.start, segment.control, segment.end])
+        points = _bezier_points(controls, _bezier_steps(controls, tolerance))
+
+    elif isinstance(segment, CubicBezier):
+        controls = np.array([segment.start, segment.control1, segment.control2, segment.end])
+        points = _bezier_points(controls, _bezier_steps(controls, tolerance))
+
+    elif isinstance(segment, Arc):
+        radius = max(abs(segment.radius.real), abs(segment.radius.imag))
+        if radius <= tolerance:
+            steps = 1
+        else:
+            # Chord error of an arc step is r * (1 - cos(step / 2))
+            max_step = math.degrees(2 * math.acos(1 - tolerance / radius))
+            steps = max(1, math.ceil(abs(segment.delta) / max_step))
+        points = np.array([segment.point(t) for t in np.linspace(0, 1, steps + 1)])
+
+    else:
+        # Unknown segment type: fall back to fixed sampling
+        points = np.array([segment.point(t) for t in np.linspace(0, 1, 11)])
+
+    return np.column_stack((points.real, points.imag))
+
+
+def flatten_path(path, tolerance):
+    """Flatten a parsed svg.path Path into a list of polylines.
+
+    Contiguous segments are chained into one polyline; a Move or a gap starts a
+    new one.
+    """
+    polylines = []
+    current = []
+    for segment in path:
+        points = flatten_segment(segment, tolerance)
+        if len(points) == 0:
+            continue
+        if current and np.array_equal(current[-1][-1], points[0]):
+            current.append(points[1:])
+        else:
+            if current:
+                polylines.append(np.concatenate(current))
+            current = [points]
+
+    if current:
+        polylines.append(np.concatenate(current))
+    return polylines
@@ -0,0 +1,174 @@
+# Geometry engine: turns layer_properties into polyline vertex arrays
+from collections import OrderedDict
+
+import numpy as np
+
+# Visible design area of the main canvas (same limits update_plot uses)
+DESIGN_X_LIMITS = (-200, 200)
+DESIGN_Y_LIMITS = (-160, 160)
+
+# Roundness rendering: 'interleave' adds one control point per edge (original look),
+# 'curve' samples a real quadratic Bézier at every corner
+ROUNDNESS_MODE = 'interleave'
+ROUNDNESS_SUBDIVISIONS = 8
+
+# LRU cache of generated layer geometry, keyed by the layer's shape properties
+LAYER_CACHE_SIZE = 64
+_layer_cache = OrderedDict()
+
+
+def generate_layer_vertices(properties):
+    """Return every shape of a layer as one (n_shapes, n_vertices, 2) array.
+
+    Scale and rotation are broadcast over the shape index, so the whole layer is
+    built with a single cos/sin evaluation.
+    """
+    num_layers = int(properties['num_layers'])
+    num_sides = int(properties['num_sides'])
+    shape_size = properties['shape_size']
+    size_increment = properties['size_increment']
+    rotation_increment = properties['rotation_increment']
+    x_offset = properties['x_offset']
+    y_offset = properties['y_offset']
+    arc_extent = properties['arc_extent']
+    roundness = properties['roundness']
+
+    shape_index = np.arange(num_layers)
+    scaled_size = (shape_size + shape_index * size_increment)[:, None]
+    rotation = np.deg2rad(shape_index * rotation_increment)[:, None]
+
+    theta = np.linspace(0, np.deg2rad(arc_extent), num_sides, endpoint=False)
+
+    # Close full polygons by repeating the first vertex
+    if arc_extent == 360:
+        theta = np.append(theta, theta[0])
+
+    angles = theta[None, :] + rotation
+    vertices = np.empty((num_layers, len(theta), 2))
+    vertices[:, :, 0] = scaled_size * np.cos(angles) + x_offset
+    vertices[:, :, 1] = scaled_size * np.sin(angles) + y_offset
+
+    # Apply roundness if needed
+    if roundness > 0:
+        if properties.get('roundness_mode', ROUNDNESS_MODE) == 'curve':
+            subdivisions = properties.get('roundness_subdivisions', ROUNDNESS_SUBDIVISIONS)
+            vertices = sample_rounded_corners(vertices, roundness, subdivisions, closed=arc_extent == 360)
+        else:
+            vertices = round_polygons(vertices, roundness)
+
+    return vertices
+
+
+def layer_cache_key(properties):
+    """Hashable key for the geometry of a layer (color does not affect vertices)."""
+    return tuple(sorted((name, value) for name, value in properties.items() if name != 'color'))
+
+
+def cached_layer_vertices(properties):
+    """generate_layer_vertices with an LRU cache; the returned array is read-only."""
+    key = layer_cache_key(properties)
+    vertices = _layer_cache.get(key)
+    if vertices is not None:
+        _layer_cache.move_to_end(key)
+        return vertices
+
+    vertices = generate_layer_vertices(properties)
+    vertices.flags.writeable = False
+    _layer_cache[key] = vertices
+    if len(_layer_cache) > LAYER_CACHE_SIZE:
+        _layer_cache.popitem(last=False)
+    return vertices
+
+
+def round_polygons(vertices, roundness_factor):
+    """Interleave a control point after every vertex for a whole batch at once.
+
+    vertices has shape (..., n, 2); the result has shape (..., 2 * (n - 1) + 1, 2)
+    and is closed back onto its first vertex, like the original per-point loop.
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    p1 = vertices[..., :-1, :]
+    p2 = vertices[..., 1:, :]
+    control = p1 + (p2 - p1) * (0.5 * roundness_factor)
+
+    n_edges = p1.shape[-2]
+    rounded = np.empty(vertices.shape[:-2] + (2 * n_edges + 1, 2))
+    rounded[..., 0:-1:2, :] = p1
+    rounded[..., 1:-1:2, :] = control
+    rounded[..., -1, :] = vertices[..., 0, :]
+    return rounded
+
+
+def sample_rounded_corners(vertices, roundness_factor, subdivisions=ROUNDNESS_SUBDIVISIONS, closed=True):
+    """Replace every corner with a sampled quadratic Bézier curve.
+
+    The corner vertex is the control point and the curve starts/ends on the
+    adjacent edges, cut back by up to half the edge length (roundness 1 or more).
+    Each corner is sampled at subdivisions + 1 points. vertices has shape
+    (..., n, 2); closed polygons repeat their first vertex at the end.
+    """
+    vertices = np.asarray(vertices, dtype=float)
+    cut = 0.5 * min(roundness_factor, 1.0)
+
+    if closed:
+        corners = vertices[..., :-1, :]
+        previous = np.roll(corners, 1, axis=-2)
+        following = np.roll(corners, -1, axis=-2)
+    else:
+        corners = vertices[..., 1:-1, :]
+        previous = vertices[..., :-2, :]
+        following = vertices[..., 2:, :]
+
+    start = corners + (previous - corners) * cut
+    end = corners + (following - corners) * cut
+
+    t = np.linspace(0, 1, subdivisions + 1)[:, None]
+    curves = (
+        (1 - t) ** 2 * start[..., None, :]
+        + 2 * t * (1 - t) * corners[..., None, :]
+        + t ** 2 * end[..., None, :]
+    )
+    curves = curves.reshape(curves.shape[:-3] + (-1, 2))
+
+    if closed:
+        return np.concatenate((curves, curves[..., :1, :]), axis=-2)
+    return np.concatenate((vertices[..., :1, :], curves, vertices[..., -1:, :]), axis=-2)
+
+
+def generate_design_vertices(layer_properties):
+    """Batch every active layer into one NaN-padded array.
+
+    Returns (vertices, counts, colors): vertices has shape
+    (total_shapes, max_vertices, 2) with unused tail rows set to NaN, counts holds
+    the real vertex count of each shape and colors the pen color of each shape.
+    Layers can differ in vertex count (sides, arc extent, roundness), hence the padding.
+    """
+    layers = [
+        (properties['color'], cached_layer_vertices(properties))
+        for _, properties in sorted(layer_properties.items())
+        if properties is not None
+    ]
+    if not layers:
+        return np.empty((0, 0, 2)), np.empty(0, dtype=int), []
+
+    total_shapes = sum(len(vertices) for _, vertices in layers)
+    max_vertices = max(vertices.shape[1] for _, vertices in layers)
+
+    padded = np.full((total_shapes, max_vertices, 2), np.nan)
+    counts = np.empty(total_shapes, dtype=int)
+    colors = []
+    row = 0
+    for color, vertices in layers:
+        n_shapes, n_vertices = vertices.shape[:2]
+        padded[row:row + n_shapes, :n_vertices] = vertices
+        counts[row:row + n_shapes] = n_vertices
+        colors.extend([color] * n_shapes)
+        row += n_shapes
+
+    return padded, counts, colors
+
+
+def generate_design_polylines(layer_properties):
+    """Return (color, points) for every shape of every active layer, in layer order."""
+    vertices, counts, colors = generate_design_vertices(layer_properties)
+    return [(color, shape[:count]) for color, shape, count in zip(colors, vertices, counts)]
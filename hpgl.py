@@ -0,0 +1,130 @@
+# HPGL generation straight from polyline vertex arrays (no SVG round-trip)
+import re
+from functools import lru_cache
+
+import numpy as np
+from matplotlib.colors import to_rgb
+
+from geometry import DESIGN_X_LIMITS, DESIGN_Y_LIMITS
+from path_optimizer import optimize_paths, merge_contiguous_paths
+from simplify import simplify_paths, SIMPLIFY_TOLERANCE
+
+# HPGL space
+HPGL_MAX_UNITS_X = 13000
+HPGL_MAX_UNITS_Y = 16800
+
+# Pen number -> layer color
+pen_color_mapping = {
+    1: 'green',
+    2: 'red',
+    3: 'blue',
+    4: 'gray',  # Default pen color
+    5: 'yellow',
+    6: 'pink'
+}
+color_to_pen = {color: pen for pen, color in pen_color_mapping.items()}
+DEFAULT_PEN = 4
+# Colors matched against when mapping arbitrary stroke colors to pens (black goes to the default pen)
+PEN_REFERENCE_COLORS = list(pen_color_mapping.items()) + [(DEFAULT_PEN, 'black')]
+
+_CSS_RGB = re.compile(r'rgb\(\s*([\d.]+)(%?)\s*,\s*([\d.]+)(%?)\s*,\s*([\d.]+)(%?)\s*\)')
+
+# Coordinate pairs per PD command, keeps each line well inside the plotter buffer
+MAX_PAIRS_PER_COMMAND = 32
+
+
+def design_to_hpgl_points(points, x_limits=DESIGN_X_LIMITS, y_limits=DESIGN_Y_LIMITS):
+    """Map design coordinates to integer plotter units.
+
+    The design frame is scaled uniformly to fit the HPGL space and the Y axis is
+    flipped so the output matches what the SVG export route produces.
+    """
+    width = x_limits[1] - x_limits[0]
+    height = y_limits[1] - y_limits[0]
+    uniform_scale = min(HPGL_MAX_UNITS_X / width, HPGL_MAX_UNITS_Y / height)
+
+    points = np.asarray(points, dtype=float)
+    hpgl_x = (points[:, 0] - x_limits[0]) * uniform_scale
+    hpgl_y = (y_limits[1] - points[:, 1]) * uniform_scale
+    return np.column_stack((hpgl_x, hpgl_y)).astype(int)
+
+
+def dedupe_points(points):
+    """Drop consecutive duplicate points left over after quantization."""
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+    return points[keep]
+
+
+def color_to_rgb(color):
+    """(r, g, b) in 0..1 for a named, hex or CSS rgb() color; None for 'none' or anything unknown."""
+    color = color.strip().lower()
+    match = _CSS_RGB.fullmatch(color)
+    if match:
+        channels = [float(value) / (100 if unit else 255) for value, unit in
+                    zip(match.group(1, 3, 5), match.group(2, 4, 6))]
+        return tuple(min(max(channel, 0.0), 1.0) for channel in channels)
+    if color in ('none', 'transparent'):
+        return None
+    try:
+        return to_rgb(color)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=256)
+def nearest_pen(color):
+    """Pen whose color is closest (RGB distance) to color; DEFAULT_PEN if it has none."""
+    rgb = color_to_rgb(color) if color else None
+    if rgb is None:
+        return DEFAULT_PEN
+    pens = [pen for pen, _ in PEN_REFERENCE_COLORS]
+    references = np.array([to_rgb(reference) for _, reference in PEN_REFERENCE_COLORS])
+    return pens[int(np.argmin(((references - rgb) ** 2).sum(axis=1)))]
+
+
+def design_to_plot_paths(polylines):
+    """Convert (color, points) design polylines to (pen, points) in plotter units."""
+    paths = []
+    for color, points in polylines:
+        scaled = dedupe_points(design_to_hpgl_points(points))
+        if len(scaled) >= 2:
+            paths.append((color_to_pen.get(color, DEFAULT_PEN), scaled))
+    return paths
+
+
+def plot_paths_to_hpgl(paths):
+    """Emit HPGL for (pen, points) paths; SP is only sent when the pen changes."""
+    hpgl_code_lines = ["IN;", "PA;"]
+    current_pen = None
+
+    for pen_number, points in paths:
+        if pen_number != current_pen:
+            hpgl_code_lines.append(f"SP{pen_number};")
+            current_pen = pen_number
+
+        # One pen-down run per path, sent as multi-coordinate PD commands
+        start_x, start_y = points[0]
+        hpgl_code_lines.append(f"PU{start_x},{start_y};")
+        for i in range(1, len(points), MAX_PAIRS_PER_COMMAND):
+            chunk = points[i:i + MAX_PAIRS_PER_COMMAND]
+            hpgl_code_lines.append("PD" + ",".join(f"{x},{y}" for x, y in chunk) + ";")
+        hpgl_code_lines.append("PU;")
+
+    return '\n'.join(hpgl_code_lines)
+
+
+def polylines_to_hpgl(polylines, optimize=True, simplify_tolerance=SIMPLIFY_TOLERANCE):
+    """Build HPGL code from (color, points) polylines in design coordinates."""
+    paths = design_to_plot_paths(polylines)
+    if simplify_tolerance > 0:
+        paths, removed = simplify_paths(paths, simplify_tolerance)
+        print(f"Simplification removed {removed} points")
+    if optimize:
+        paths = optimize_paths(paths)
+    return plot_paths_to_hpgl(merge_contiguous_paths(paths))
+
+
+def write_hpgl(hpgl_code, filename="output.hpgl"):
+    with open(filename, "w") as hpgl_file:
+        hpgl_file.write(hpgl_code)
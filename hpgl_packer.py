@@ -0,0 +1,144 @@
+# Command packing: rewrites HPGL to send as few bytes as possible over the serial line
+from hpgl import MAX_PAIRS_PER_COMMAND
+from hpgl_parser import iter_hpgl_commands
+
+
+def _format_number(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return f"{value:.3f}".rstrip('0').rstrip('.')
+
+
+def _format_pairs(pairs):
+    return ",".join(f"{_format_number(x)},{_format_number(y)}" for x, y in pairs)
+
+
+def _read_ops(hpgl_code):
+    """Turn HPGL into a list of ops with all coordinates made absolute.
+
+    ('init', text), ('pen', n), ('state', pen_down), ('move', pen_down, points)
+    or ('raw', text) for commands the packer leaves alone. Repeated selections
+    of the same pen are dropped here.
+    """
+    ops = []
+    position = (0.0, 0.0)
+    absolute = True
+    pen_down = False
+    selected_pen = None
+
+    for mnemonic, params, text in iter_hpgl_commands(hpgl_code):
+        if mnemonic == 'IN':
+            ops.append(('init', text))
+            position, absolute, pen_down, selected_pen = (0.0, 0.0), True, False, None
+            continue
+        if mnemonic == 'SP':
+            pen = int(params[0]) if params else 0
+            if pen != selected_pen:
+                ops.append(('pen', pen))
+                selected_pen = pen
+            continue
+        if mnemonic in ('PA', 'PR'):
+            absolute = mnemonic == 'PA'
+        elif mnemonic in ('PU', 'PD'):
+            pen_down = mnemonic == 'PD'
+            if len(params) < 2:
+                ops.append(('state', pen_down))
+                continue
+        else:
+            ops.append(('raw', text))
+            continue
+
+        for x, y in zip(params[0::2], params[1::2]):
+            position = (x, y) if absolute else (position[0] + x, position[1] + y)
+            if ops and ops[-1][0] == 'move' and ops[-1][1] == pen_down:
+                ops[-1][2].append(position)
+            else:
+                ops.append(('move', pen_down, [position]))
+
+    return ops
+
+
+def _next_move_state(ops, index):
+    """Pen state set by the very next op if it is a move, else None.
+
+    Pen changes are not looked past so the pen is always lifted before SP.
+    """
+    if index + 1 < len(ops) and ops[index + 1][0] == 'move':
+        return ops[index + 1][1]
+    return None
+
+
+def _emit(ops, relative):
+    commands = []
+    absolute = True
+    position = (0.0, 0.0)
+    pen_down = None  # Unknown until IN or the first pen command
+
+    for index, op in enumerate(ops):
+        kind = op[0]
+        if kind == 'init':
+            commands.append(op[1])
+            absolute, position, pen_down = True, (0.0, 0.0), False
+
+        elif kind == 'pen':
+            commands.append(f"SP{op[1]}")
+
+        elif kind == 'raw':
+            commands.append(op[1])
+
+        elif kind == 'state':
+            # A following PU/PD with coordinates sets the pen state itself
+            if op[1] == pen_down or _next_move_state(ops, index) == op[1]:
+                continue
+            commands.append("PD" if op[1] else "PU")
+            pen_down = op[1]
+
+        elif kind == 'move':
+            down = op[1]
+            # Only the final pen-up position matters
+            points = op[2] if down else op[2][-1:]
+            mnemonic = "PD" if down else "PU"
+
+            use_relative = False
+            if relative and all(float(v).is_integer() for point in points + [position] for v in point):
+                deltas = []
+                previous = position
+                for point in points:
+                    deltas.append((point[0] - previous[0], point[1] - previous[1]))
+                    previous = point
+                absolute_cost = len(_format_pairs(points)) + (0 if absolute else 3)
+                relative_cost = len(_format_pairs(deltas)) + (3 if absolute else 0)
+                use_relative = relative_cost < absolute_cost
+
+            if use_relative and absolute:
+                commands.append("PR")
+                absolute = False
+            elif not use_relative and not absolute:
+                commands.append("PA")
+                absolute = True
+
+            coordinates = deltas if use_relative else points
+            for i in range(0, len(coordinates), MAX_PAIRS_PER_COMMAND):
+                commands.append(mnemonic + _format_pairs(coordinates[i:i + MAX_PAIRS_PER_COMMAND]))
+            position = points[-1]
+            pen_down = down
+
+    return [f"{command};" for command in commands]
+
+
+def hpgl_byte_count(hpgl_code):
+    """Bytes put on the wire for hpgl_code (commands only, no line breaks)."""
+    return sum(len(command) + 1 for _, _, command in iter_hpgl_commands(hpgl_code))
+
+
+def pack_hpgl(hpgl_code, relative=True):
+    """Pack HPGL for transmission; returns (packed_code, report).
+
+    Consecutive coordinates are coalesced into multi-coordinate PU/PD commands,
+    pen-up runs are reduced to their final position, redundant PA/PR/PU/PD
+    toggles and repeated SP selections are dropped, and (when relative is true)
+    PR is used wherever it is shorter. The report holds bytes before and after.
+    """
+    packed = '\n'.join(_emit(_read_ops(hpgl_code), relative))
+    report = {'bytes_before': hpgl_byte_count(hpgl_code), 'bytes_after': hpgl_byte_count(packed)}
+    return packed, report
@@ -0,0 +1,238 @@
+# Single-pass HPGL parser: commands to struct-of-arrays NumPy buffers, streaming from files
+import re
+from array import array
+
+import numpy as np
+
+READ_CHUNK = 1 << 20  # Bytes read at a time from .hpgl files
+
+_NUMBER = re.compile(r"[-+]?\d*\.\d+|[-+]?\d+")
+_COMMAND = re.compile(r"[^;\n]+")
+
+LABEL_TERMINATOR = b'\x03'  # ETX ends LB text unless DT sets another terminator
+# Device-control escapes (ESC . x) that take parameters up to a ':'; the others are 3 bytes
+ESCAPES_WITH_PARAMETERS = b'@HIMNST'
+_WHITESPACE = b' \t\r\n'
+
+
+def _split_chunks(chunks):
+    """Yield command texts from text chunks; commands may straddle chunk boundaries."""
+    tail = ""
+    for chunk in chunks:
+        text = tail + chunk
+        cut = max(text.rfind(';'), text.rfind('\n'))
+        if cut < 0:
+            tail = text
+            continue
+        tail = text[cut + 1:]
+        for match in _COMMAND.finditer(text, 0, cut):
+            yield match.group()
+    if tail:
+        yield tail
+
+
+def iter_chunk_commands(chunks):
+    """Yield (mnemonic, params, text) for the commands in a stream of text chunks."""
+    for command in _split_chunks(chunks):
+        command = command.strip()
+        if len(command) < 2:
+            continue
+        try:
+            # Fast path for the usual comma-separated parameters
+            params = [float(p) for p in command[2:].split(',')] if len(command) > 2 else []
+        except ValueError:
+            params = [float(p) for p in _NUMBER.findall(command, 2)]
+        yield command[:2].upper(), params, command
+
+
+def iter_hpgl_commands(hpgl_code):
+    """Yield (mnemonic, params, text) for every ';'- or newline-separated command."""
+    return iter_chunk_commands([hpgl_code])
+
+
+def read_hpgl_chunks(filename, chunk_size=READ_CHUNK):
+    """Yield a .hpgl file as text chunks without reading it whole."""
+    with open(filename, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk.decode("ascii", errors="replace")
+
+
+def read_hpgl_bytes(filename, chunk_size=READ_CHUNK):
+    """Yield a .hpgl file as raw byte chunks."""
+    with open(filename, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _raw_command_end(data, start, label_terminator):
+    """End offset of the raw command starting at data[start], or None if it continues past data.
+
+    A command ends after its ';', a label (LB) after its terminator and an
+    escape sequence after its 3 bytes or, for those with parameters, its ':'.
+    """
+    lead = start
+    while lead < len(data) and data[lead] in _WHITESPACE:
+        lead += 1  # Leading line breaks travel with the command that follows
+    if lead + 3 > len(data):
+        return None
+    if data[lead] == 0x1b:
+        if data[lead + 2] not in ESCAPES_WITH_PARAMETERS:
+            return lead + 3
+        end = data.find(b':', lead + 3)
+    elif data[lead:lead + 2].upper() == b'LB':
+        end = data.find(label_terminator, lead + 2)
+    else:
+        end = data.find(b';', lead)
+    return None if end < 0 else end + 1
+
+
+def split_raw_commands(chunks):
+    """Yield byte chunks as raw commands whose concatenation is exactly the input.
+
+    Nothing is stripped or re-encoded: empty parameters, spaces and ';' inside
+    labels reach the plotter as written. The label terminator follows DT.
+    """
+    pending = b''
+    label_terminator = LABEL_TERMINATOR
+    for chunk in chunks:
+        pending += chunk
+        position = 0
+        while True:
+            end = _raw_command_end(pending, position, label_terminator)
+            if end is None:
+                break
+            command = pending[position:end]
+            mnemonic = command.lstrip(_WHITESPACE)[:2].upper()
+            if mnemonic == b'DT':
+                terminator = command.lstrip(_WHITESPACE)[2:3]
+                label_terminator = terminator if terminator not in (b'', b';') else LABEL_TERMINATOR
+            yield command
+            position = end
+        pending = pending[position:]
+    if pending:
+        yield pending  # Unterminated tail, sent as written
+
+
+def iter_hpgl_file_commands(filename, chunk_size=READ_CHUNK):
+    """Yield a .hpgl file as the raw commands sent to the plotter, byte for byte as in the file."""
+    return split_raw_commands(read_hpgl_bytes(filename, chunk_size))
+
+
+class HPGLProgram:
+    """A parsed HPGL job as parallel arrays, one entry per move.
+
+    x, y are where each move ends (plotter units), pen the pen selected and
+    pen_down whether it draws; command is the index of the command the move
+    came from. Every move starts where the previous one ended, the first at
+    the origin (IN adds a pen-up move back to the origin).
+    """
+
+    def __init__(self, x, y, pen, pen_down, command, n_commands):
+        self.x = x
+        self.y = y
+        self.pen = pen
+        self.pen_down = pen_down
+        self.command = command
+        self.n_commands = n_commands
+
+    def __len__(self):
+        return len(self.x)
+
+    def ends(self):
+        return np.column_stack((self.x, self.y))
+
+    def starts(self):
+        starts = np.empty((len(self), 2))
+        starts[:1] = 0.0
+        starts[1:, 0] = self.x[:-1]
+        starts[1:, 1] = self.y[:-1]
+        return starts
+
+    def segments(self, mask=None):
+        """Moves as an (n, 2, 2) array of start/end points, e.g. for a LineCollection."""
+        segments = np.stack((self.starts(), self.ends()), axis=1)
+        return segments if mask is None else segments[mask]
+
+    def paths(self):
+        """Pen-down runs as (pen, points) paths, ready for the path optimizer."""
+        drawing = self.pen_down
+        # continues[i]: move i extends a stroke drawn by move i - 1 with the same pen
+        continues = np.zeros(len(self), dtype=bool)
+        continues[1:] = drawing[1:] & drawing[:-1] & (self.pen[1:] == self.pen[:-1])
+        firsts = np.flatnonzero(drawing & ~continues)
+        lasts = np.flatnonzero(drawing & ~np.append(continues[1:], False))
+        starts = self.starts()
+        ends = self.ends()
+        return [(int(self.pen[first]), np.vstack((starts[first], ends[first:last + 1])))
+                for first, last in zip(firsts, lasts)]
+
+
+def parse_commands(commands):
+    """Build an HPGLProgram from (mnemonic, params, text) commands in one pass.
+
+    Understands multi-coordinate PU/PD/PA/PR commands as well as SP and IN.
+    """
+    xs, ys = array('d'), array('d')
+    pens, downs, indices = array('h'), array('b'), array('q')
+
+    def add_move(x, y, pen, pen_down, index):
+        xs.append(x)
+        ys.append(y)
+        pens.append(pen)
+        downs.append(pen_down)
+        indices.append(index)
+
+    x = y = 0.0
+    pen_down = False
+    absolute = True
+    pen = 0
+    index = -1
+
+    for index, (mnemonic, params, _) in enumerate(commands):
+        if mnemonic == 'SP':
+            pen = int(params[0]) if params else 0
+            continue
+        if mnemonic == 'IN':
+            if x or y:
+                add_move(0.0, 0.0, pen, False, index)
+            x = y = 0.0
+            pen_down, absolute = False, True
+            continue
+        if mnemonic in ('PU', 'PD'):
+            pen_down = mnemonic == 'PD'
+        elif mnemonic in ('PA', 'PR'):
+            absolute = mnemonic == 'PA'
+        else:
+            continue
+
+        for i in range(0, len(params) - 1, 2):
+            if absolute:
+                x, y = params[i], params[i + 1]
+            else:
+                x, y = x + params[i], y + params[i + 1]
+            add_move(x, y, pen, pen_down, index)
+
+    return HPGLProgram(
+        np.frombuffer(xs, dtype=np.float64),
+        np.frombuffer(ys, dtype=np.float64),
+        np.frombuffer(pens, dtype=np.int16),
+        np.frombuffer(downs, dtype=np.int8).astype(bool),
+        np.frombuffer(indices, dtype=np.int64),
+        index + 1,
+    )
+
+
+def parse_hpgl(hpgl_code):
+    """Parse HPGL text into an HPGLProgram."""
+    return parse_commands(iter_hpgl_commands(hpgl_code))
+
+
+def parse_hpgl_file(filename, chunk_size=READ_CHUNK):
+    """Parse a .hpgl file into an HPGLProgram, reading it in chunks."""
+    return parse_commands(iter_chunk_commands(read_hpgl_chunks(filename, chunk_size)))
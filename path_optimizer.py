@@ -0,0 +1,180 @@
+# Pen-up travel optimizer: orders plot paths to cut slewing and pen changes
+import numpy as np
+
+# Above this many paths the nearest-neighbour search uses a grid index
+GRID_INDEX_THRESHOLD = 2000
+# 2-opt is O(n^2) per pass, so it is only run on groups up to this size
+TWO_OPT_MAX_PATHS = 1500
+TWO_OPT_MAX_PASSES = 5
+
+
+def travel_distance(paths, start=(0, 0)):
+    """Total pen-up distance in plotter units for (pen, points) paths in order."""
+    position = np.asarray(start, dtype=float)
+    total = 0.0
+    for _, points in paths:
+        total += np.hypot(*(points[0] - position))
+        position = points[-1]
+    return total
+
+
+class _GridIndex:
+    """Uniform grid over path endpoints for nearest-unvisited lookups."""
+
+    def __init__(self, endpoints, cells_per_axis):
+        self.endpoints = endpoints
+        low = endpoints.min(axis=0)
+        span = np.maximum(endpoints.max(axis=0) - low, 1.0)
+        self.low = low
+        self.cell_size = span / cells_per_axis
+        self.cells_per_axis = cells_per_axis
+        self.cells = {}
+        for index, cell in enumerate(map(tuple, self._cell_of(endpoints))):
+            self.cells.setdefault(cell, []).append(index)
+
+    def _cell_of(self, points):
+        cell = ((points - self.low) // self.cell_size).astype(int)
+        return np.clip(cell, 0, self.cells_per_axis - 1)
+
+    def remove(self, index):
+        self.cells[tuple(self._cell_of(self.endpoints[index]))].remove(index)
+
+    def nearest(self, point):
+        cx, cy = self._cell_of(point)
+        ring = 0
+        best_index, best_dist = None, np.inf
+        while ring <= self.cells_per_axis:
+            candidates = []
+            for x in range(cx - ring, cx + ring + 1):
+                for y in range(cy - ring, cy + ring + 1):
+                    if max(abs(x - cx), abs(y - cy)) == ring:
+                        candidates.extend(self.cells.get((x, y), ()))
+            if candidates:
+                candidates = np.array(candidates)
+                dist = np.hypot(*(self.endpoints[candidates] - point).T)
+                k = np.argmin(dist)
+                if dist[k] < best_dist:
+                    best_index, best_dist = int(candidates[k]), dist[k]
+            # Anything outside this ring is at least ring * cell_size away
+            if best_index is not None and best_dist <= ring * self.cell_size.min():
+                break
+            ring += 1
+        return best_index
+
+
+def _nearest_neighbour_order(starts, ends, position):
+    """Greedy order; returns (order, reversed_flags)."""
+    n = len(starts)
+    # Endpoint k < n is the start of path k, k >= n the end of path k - n
+    endpoints = np.concatenate((starts, ends))
+    order = []
+    reversed_flags = []
+
+    if n > GRID_INDEX_THRESHOLD:
+        index = _GridIndex(endpoints, int(np.sqrt(n)))
+        for _ in range(n):
+            k = index.nearest(position)
+            path = k % n
+            index.remove(path)
+            index.remove(path + n)
+            order.append(path)
+            reversed_flags.append(k >= n)
+            position = starts[path] if k >= n else ends[path]
+    else:
+        available = np.ones(2 * n, dtype=bool)
+        for _ in range(n):
+            dist = np.hypot(*(endpoints - position).T)
+            dist[~available] = np.inf
+            k = int(np.argmin(dist))
+            path = k % n
+            available[path] = available[path + n] = False
+            order.append(path)
+            reversed_flags.append(k >= n)
+            position = starts[path] if k >= n else ends[path]
+
+    return np.array(order, dtype=int), np.array(reversed_flags, dtype=bool)
+
+
+def _two_opt(starts, ends, position):
+    """Improve an oriented path order in place with 2-opt segment reversals.
+
+    Reversing the run i+1..j also reverses each path in it, so every path keeps
+    its pen-down geometry and only the pen-up links change. Returns the new
+    permutation and per-path reversal flags.
+    """
+    n = len(starts)
+    order = np.arange(n)
+    flipped = np.zeros(n, dtype=bool)
+    starts = starts.copy()
+    ends = ends.copy()
+
+    for _ in range(TWO_OPT_MAX_PASSES):
+        improved = False
+        for i in range(-1, n - 1):
+            # Link i -> i+1 (i = -1 is the link from the current pen position)
+            a = position if i < 0 else ends[i]
+            b = starts[i + 1]
+            j = np.arange(i + 1, n)
+            c = ends[j]
+            d_next = np.zeros((len(j), 2))
+            d_next[:-1] = starts[j[:-1] + 1]
+            old = np.hypot(*(a - b)) + np.hypot(*(c - d_next).T)
+            new = np.hypot(*(a - c).T) + np.hypot(*(b - d_next).T)
+            # The last path has no outgoing link
+            old[-1] = np.hypot(*(a - b))
+            new[-1] = np.hypot(*(a - c[-1]))
+            delta = new - old
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                lo, hi = i + 1, j[k] + 1
+                order[lo:hi] = order[lo:hi][::-1]
+                flipped[lo:hi] = ~flipped[lo:hi][::-1]
+                starts[lo:hi], ends[lo:hi] = ends[lo:hi][::-1].copy(), starts[lo:hi][::-1].copy()
+                improved = True
+        if not improved:
+            break
+
+    return order, flipped
+
+
+def optimize_paths(paths, start=(0, 0)):
+    """Group paths by pen and order each group to minimise pen-up travel.
+
+    paths is a list of (pen, points) with points an (n, 2) array in plotter units.
+    Each pen group is ordered by nearest neighbour followed by 2-opt, and a path
+    is reversed when its far endpoint is the closer one.
+    """
+    position = np.asarray(start, dtype=float)
+    optimized = []
+
+    for pen in sorted({pen for pen, _ in paths}):
+        group = [points for path_pen, points in paths if path_pen == pen]
+        starts = np.array([points[0] for points in group], dtype=float)
+        ends = np.array([points[-1] for points in group], dtype=float)
+
+        order, reversed_flags = _nearest_neighbour_order(starts, ends, position)
+        starts_nn = np.where(reversed_flags[:, None], ends[order], starts[order])
+        ends_nn = np.where(reversed_flags[:, None], starts[order], ends[order])
+
+        if len(order) <= TWO_OPT_MAX_PATHS:
+            refine, flipped = _two_opt(starts_nn, ends_nn, position)
+            order = order[refine]
+            reversed_flags = reversed_flags[refine] ^ flipped
+
+        for path, is_reversed in zip(order, reversed_flags):
+            points = group[path]
+            optimized.append((pen, points[::-1] if is_reversed else points))
+        position = np.asarray(optimized[-1][1][-1], dtype=float)
+
+    return optimized
+
+
+def merge_contiguous_paths(paths):
+    """Join consecutive same-pen paths where one ends exactly where the next starts."""
+    merged = []
+    for pen, points in paths:
+        if merged and merged[-1][0] == pen and np.array_equal(merged[-1][1][-1], points[0]):
+            merged[-1] = (pen, np.concatenate((merged[-1][1], points[1:])))
+        else:
+            merged.append((pen, points))
+    return merged
@@ -0,0 +1,132 @@
+# Resumable plot jobs: checkpoints the last acknowledged command so a dropped link or plotter error does not restart the plot
+import hashlib
+import itertools
+import json
+import os
+import time
+
+from hpgl_parser import iter_chunk_commands, iter_hpgl_file_commands
+from plot_worker import PlotWorker
+from plotter_stream import ESC, HANDSHAKE_BUFFER, split_commands
+
+CHECKPOINT_FILE = "plot_checkpoint.json"
+# Set-up commands replayed before resuming (scaling, windows, speed, line type)
+SETUP_COMMANDS = ('IP', 'SC', 'IW', 'RO', 'VS', 'FS', 'LT')
+
+
+def _format_number(value):
+    return f"{value:g}"
+
+
+def plotter_state(commands):
+    """Replay commands (byte strings) and return the state the plotter is left in.
+
+    Returns a dict with the selected pen, position, pen_down, absolute and the
+    set-up commands issued since the last IN.
+    """
+    state = {'pen': 0, 'position': (0.0, 0.0), 'pen_down': False, 'absolute': True, 'setup': []}
+    # Labels and escape sequences do not change pen or position; their text may contain ';'
+    texts = (command.decode('ascii', errors='replace') + '\n' for command in commands
+             if command.lstrip()[:2].upper() != b'LB' and not command.lstrip().startswith(ESC))
+    for mnemonic, params, text in iter_chunk_commands(texts):
+        if mnemonic == 'IN':
+            state.update(pen=0, position=(0.0, 0.0), pen_down=False, absolute=True, setup=[])
+        elif mnemonic == 'SP':
+            state['pen'] = int(params[0]) if params else 0
+        elif mnemonic in SETUP_COMMANDS:
+            state['setup'].append(text)
+        elif mnemonic in ('PA', 'PR', 'PU', 'PD'):
+            if mnemonic in ('PA', 'PR'):
+                state['absolute'] = mnemonic == 'PA'
+            else:
+                state['pen_down'] = mnemonic == 'PD'
+            for x, y in zip(params[0::2], params[1::2]):
+                if state['absolute']:
+                    state['position'] = (x, y)
+                else:
+                    state['position'] = (state['position'][0] + x, state['position'][1] + y)
+    return state
+
+
+class PlotJob:
+    """An HPGL job and its checkpoint file.
+
+    The checkpoint records which job it belongs to (a hash of the commands) and
+    how many commands the plotter has acknowledged. resume_commands() rebuilds
+    the plotter state at that point so the plot carries on where it stopped.
+
+    Jobs made from a .hpgl filename are streamed from the file and never held
+    in memory as a whole.
+    """
+
+    def __init__(self, hpgl_code=None, checkpoint_path=CHECKPOINT_FILE, filename=None):
+        self.filename = filename
+        self.commands = None if filename else split_commands(hpgl_code)
+        self.checkpoint_path = checkpoint_path
+
+        digest = hashlib.sha1()
+        self.total = 0
+        for command in self.iter_commands():
+            digest.update(command + b'\n')
+            self.total += 1
+        self.job_id = digest.hexdigest()
+
+    def iter_commands(self, start=0):
+        """The job's commands from index start on."""
+        commands = self.commands if self.filename is None else iter_hpgl_file_commands(self.filename)
+        return itertools.islice(commands, start, None)
+
+    def load_checkpoint(self):
+        """Acknowledged command count from the checkpoint, 0 if there is none for this job."""
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if checkpoint.get('job') != self.job_id:
+            return 0
+        acked = int(checkpoint.get('acked', 0))
+        return acked if 0 < acked < self.total else 0
+
+    def save_checkpoint(self, acked):
+        """Write the checkpoint atomically; a finished job removes it."""
+        if acked >= self.total:
+            self.clear_checkpoint()
+            return
+        checkpoint = {'job': self.job_id, 'acked': acked, 'total': self.total, 'saved': time.time()}
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    def resume_preamble(self, start):
+        """Commands that restore the plotter state reached after commands[:start]."""
+        state = plotter_state(itertools.islice(self.iter_commands(), start))
+        x, y = (_format_number(v) for v in state['position'])
+        # No bare PD: it would dot the paper at the resume point, and the job's next PD sets the pen down again
+        preamble = ["IN;", *state['setup'], f"SP{state['pen']};", "PA;", f"PU{x},{y};"]
+        if not state['absolute']:
+            preamble.append("PR;")
+        return [command.encode() for command in preamble]
+
+    def resume_commands(self, start):
+        """(commands, preamble): an iterator over what to send to resume at start."""
+        preamble = self.resume_preamble(start) if start > 0 else []
+        return itertools.chain(preamble, self.iter_commands(start)), preamble
+
+    def create_worker(self, connection, handshake=HANDSHAKE_BUFFER, start=0):
+        """PlotWorker for commands[start:] that keeps the checkpoint file up to date."""
+        commands, preamble = self.resume_commands(start)
+
+        def checkpoint(acked):
+            # Map the worker's count back to an index into the whole job
+            self.save_checkpoint(start + max(0, acked - len(preamble)))
+
+        total = len(preamble) + self.total - start
+        return PlotWorker(connection, commands, total=total, handshake=handshake, checkpoint=checkpoint)
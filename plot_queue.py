@@ -0,0 +1,271 @@
+# Multi-plotter job queue: spreads HPGL jobs over a pool of serial plotters
+import itertools
+import os
+import queue
+import threading
+import time
+
+import serial
+
+from plot_job import PlotJob
+from plotter_stream import HANDSHAKE_BUFFER
+
+CHECKPOINT_DIR = "plot_checkpoints"  # One checkpoint file per queued job
+WORKER_POLL_INTERVAL = 0.1  # Seconds between progress checks on a running job
+
+
+class PlotterDevice:
+    """A configured plotter: serial port, baud rate and handshake.
+
+    The port is opened on the first job and kept open. Devices stop taking jobs
+    after a failed one (state 'error') until reset() is called.
+    """
+
+    def __init__(self, port, baud_rate=9600, handshake=HANDSHAKE_BUFFER):
+        self.port = port
+        self.baud_rate = int(baud_rate)
+        self.handshake = handshake
+        self.connection = None
+        self.state = 'idle'  # idle, busy, error or stopped
+        self.current_job = None
+        self.jobs_done = 0
+        self.busy_seconds = 0.0
+        self.busy_since = None
+        self.error = None
+
+    def open(self):
+        if self.connection is None:
+            self.connection = serial.Serial(self.port, self.baud_rate, timeout=1)
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def reset(self):
+        """Clear an error so the device takes jobs again (reopening the port)."""
+        self.close()
+        self.error = None
+        if self.state == 'error':
+            self.state = 'idle'
+
+    def busy_time(self):
+        if self.busy_since is None:
+            return self.busy_seconds
+        return self.busy_seconds + time.monotonic() - self.busy_since
+
+
+class QueuedJob:
+    """One HPGL job waiting in or taken from the queue."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, hpgl_code=None, name=None, checkpoint_dir=CHECKPOINT_DIR, filename=None):
+        self.id = next(self._ids)
+        self.name = name or (os.path.basename(filename) if filename else f"job {self.id}")
+        self.plot_job = PlotJob(hpgl_code, os.path.join(checkpoint_dir, f"{self.id}.json"), filename)
+        self.state = 'queued'  # queued, running, finished, failed or cancelled
+        self.device = None
+        self.worker = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    def progress(self):
+        if self.worker is None:
+            return None
+        return self.worker.progress()
+
+
+class PlotQueue:
+    """Holds HPGL jobs and runs them on a pool of PlotterDevices.
+
+    Each device has a dispatcher thread that takes the next queued job and
+    streams it with a PlotWorker, so every port plots concurrently. stats()
+    reports queue depth, per-device utilization and jobs per hour for the UI.
+    """
+
+    def __init__(self, devices, checkpoint_dir=CHECKPOINT_DIR):
+        self.devices = list(devices)
+        self.checkpoint_dir = checkpoint_dir
+        self.jobs = []
+        self.queue = queue.Queue()
+        self.started_at = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, hpgl_code=None, name=None, filename=None):
+        """Queue a job given as HPGL text or a .hpgl filename; returns its QueuedJob."""
+        job = QueuedJob(hpgl_code, name, self.checkpoint_dir, filename)
+        with self._lock:
+            self.jobs.append(job)
+        self.queue.put(job)
+        return job
+
+    def add_jobs(self, jobs):
+        """Queue QueuedJobs taken from another queue (see take_queued); they resume from their checkpoints."""
+        for job in jobs:
+            job.state = 'queued'
+            job.device = job.worker = job.error = None
+            with self._lock:
+                self.jobs.append(job)
+            self.queue.put(job)
+
+    def take_queued(self):
+        """Remove the jobs still waiting to run and return them, e.g. to move them to a new pool."""
+        with self._lock:
+            taken = [job for job in self.jobs if job.state == 'queued']
+            self.jobs = [job for job in self.jobs if job.state != 'queued']
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return taken
+
+    def retry(self, job):
+        """Queue a failed or cancelled job again; it resumes from its checkpoint."""
+        with self._lock:
+            if job.state not in ('failed', 'cancelled'):
+                return False
+            job.state = 'queued'
+            job.device = job.worker = job.error = None
+        self.queue.put(job)
+        return True
+
+    def cancel(self, job):
+        """Cancel a queued or running job."""
+        with self._lock:
+            if job.state == 'queued':
+                job.state = 'cancelled'
+            elif job.state == 'running' and job.worker is not None:
+                job.worker.cancel()
+
+    def start(self):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self.started_at = time.monotonic()
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._dispatch, args=(device,), daemon=True)
+                         for device in self.devices]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, cancel_running=False):
+        """Stop taking new jobs; running jobs finish unless cancel_running is set."""
+        self._stop.set()
+        if cancel_running:
+            for device in self.devices:
+                if device.current_job is not None and device.current_job.worker is not None:
+                    device.current_job.worker.cancel()
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+        for device in self.devices:
+            device.close()
+
+    def wait_until_empty(self, timeout=None):
+        """Block until every submitted job has ended.
+
+        Returns False on timeout, or when jobs are left but every device is in
+        error (nothing would take them until a device is reset).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while any(job.state in ('queued', 'running') for job in self.jobs):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if all(device.state == 'error' for device in self.devices):
+                return False
+            time.sleep(WORKER_POLL_INTERVAL)
+        return True
+
+    def _next_job(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.get(timeout=WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            with self._lock:
+                if job.state == 'queued':
+                    job.state = 'running'
+                    return job
+        return None
+
+    def _dispatch(self, device):
+        while not self._stop.is_set():
+            if device.state == 'error':
+                time.sleep(WORKER_POLL_INTERVAL)  # Wait for reset()
+                continue
+            job = self._next_job()
+            if job is not None:
+                self._run_job(device, job)
+        if device.state != 'error':
+            device.state = 'stopped'
+
+    def _run_job(self, device, job):
+        job.device = device
+        job.started_at = time.monotonic()
+        device.current_job = job
+        device.state = 'busy'
+        device.busy_since = job.started_at
+        try:
+            connection = device.open()
+            start = job.plot_job.load_checkpoint()
+            job.worker = job.plot_job.create_worker(connection, device.handshake, start)
+            job.worker.start()
+            while not job.worker.done:
+                time.sleep(WORKER_POLL_INTERVAL)
+            job.worker.join()
+            state, error = job.worker.state, job.worker.error
+        except Exception as e:
+            state, error = 'failed', e
+        finally:
+            job.finished_at = time.monotonic()
+            device.busy_seconds += job.finished_at - device.busy_since
+            device.busy_since = None
+            device.current_job = None
+
+        if state == 'failed':
+            # The device may be unplugged or jammed; the job keeps its checkpoint
+            device.error = error
+            device.state = 'error'
+            if job.worker is None or job.worker.progress()['commands_acked'] == 0:
+                # Nothing was plotted, so another device can take the job
+                job.device = job.worker = None
+                job.state = 'queued'
+                self.queue.put(job)
+                return
+        else:
+            device.state = 'idle'
+            if state == 'finished':
+                device.jobs_done += 1
+        job.state, job.error = state, error
+
+    def stats(self):
+        """Queue depth, job counts, jobs per hour and per-device utilization."""
+        with self._lock:
+            states = [job.state for job in self.jobs]
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        finished = states.count('finished')
+        devices = []
+        for device in self.devices:
+            devices.append({
+                'port': device.port,
+                'state': device.state,
+                'job': device.current_job.name if device.current_job is not None else None,
+                'jobs_done': device.jobs_done,
+                'utilization': device.busy_time() / elapsed if elapsed else 0.0,
+                'error': device.error,
+            })
+        return {
+            'queue_depth': states.count('queued'),
+            'running': states.count('running'),
+            'finished': finished,
+            'failed': states.count('failed'),
+            'cancelled': states.count('cancelled'),
+            'jobs_per_hour': finished / elapsed * 3600 if elapsed else 0.0,
+            'elapsed': elapsed,
+            'devices': devices,
+        }
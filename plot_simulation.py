@@ -0,0 +1,125 @@
+# Animated plot simulation: plays a parsed job back against the time model with blitted frames
+import numpy as np
+from matplotlib.collections import LineCollection
+
+TRAVEL_COLOR = 'lightblue'
+HEAD_STYLE = {'marker': 'o', 'markersize': 6, 'color': 'black', 'linestyle': 'none'}
+
+
+class PlotTimeline:
+    """When each move of a job starts and ends, from PlotTimeModel.move_durations."""
+
+    def __init__(self, program, model):
+        self.starts = program.starts()
+        self.ends = program.ends()
+        self.durations = model.move_durations(program)
+        self.end_times = np.cumsum(self.durations)
+        self.total = float(self.end_times[-1]) if len(self.end_times) else 0.0
+
+    def moves_done(self, t):
+        """Number of moves finished at time t."""
+        return int(np.searchsorted(self.end_times, t, side='right'))
+
+    def head(self, t):
+        """(start, position) of the move in progress at time t; start is None once the job is done."""
+        index = self.moves_done(t)
+        if index >= len(self.durations):
+            return None, self.ends[-1] if len(self.ends) else np.zeros(2)
+        begin = self.end_times[index] - self.durations[index]
+        fraction = (t - begin) / self.durations[index] if self.durations[index] > 0 else 1.0
+        start = self.starts[index]
+        return start, start + (self.ends[index] - start) * min(max(fraction, 0.0), 1.0)
+
+
+class PlotSimulation:
+    """Draws a PlotTimeline on an Axes, advancing incrementally with blitting.
+
+    Finished moves live in two static collections (drawing in pen colors,
+    travel dashed). Playing forward only draws the moves finished since the
+    last frame onto the cached background and copies it again, so a frame
+    costs the same early or late in a long job. Jumping (scrubbing, resizing)
+    refills the static collections and triggers one full draw; the canvas
+    owner should call seek(simulation.time) on resize for the same reason.
+    segments is the (n, 2, 2) move array in the coordinates shown and colors
+    one color per move.
+    """
+
+    def __init__(self, ax, canvas, timeline, segments, pen_down, colors):
+        self.ax = ax
+        self.canvas = canvas
+        self.timeline = timeline
+        self.segments = segments
+        self.pen_down = pen_down
+        self.colors = np.asarray(colors, dtype=object)
+        self.time = 0.0
+        self.shown = 0  # Moves in the static collections / cached background
+        self.background = None
+
+        self.drawn = LineCollection([], linewidths=1)
+        self.travel = LineCollection([], colors=TRAVEL_COLOR, linestyles='dashed', linewidths=1)
+        self.new_drawn = LineCollection([], linewidths=1, animated=True)
+        self.new_travel = LineCollection([], colors=TRAVEL_COLOR, linestyles='dashed', linewidths=1, animated=True)
+        for collection in (self.travel, self.drawn, self.new_travel, self.new_drawn):
+            ax.add_collection(collection)
+        self.partial, = ax.plot([], [], color='black', linewidth=1, animated=True)
+        self.head, = ax.plot([], [], animated=True, **HEAD_STYLE)
+
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def _fill(self, drawn, travel, first, last):
+        pen_down = self.pen_down[first:last]
+        drawn.set_segments(self.segments[first:last][pen_down])
+        drawn.set_color(list(self.colors[first:last][pen_down]))
+        travel.set_segments(self.segments[first:last][~pen_down])
+
+    def _set_head(self):
+        start, position = self.timeline.head(self.time)
+        self.head.set_data([position[0]], [position[1]])
+        if start is None:
+            self.partial.set_data([], [])
+            return
+        # The move in progress, styled like it will be once finished
+        index = self.timeline.moves_done(self.time)
+        if self.pen_down[index]:
+            self.partial.set(color=self.colors[index], linestyle='solid')
+        else:
+            self.partial.set(color=TRAVEL_COLOR, linestyle='dashed')
+        self.partial.set_data([start[0], position[0]], [start[1], position[1]])
+
+    def _draw_animated(self):
+        self.ax.draw_artist(self.partial)
+        self.ax.draw_artist(self.head)
+
+    def on_draw(self, event):
+        """After a full draw, cache the background (finished moves only) and draw the pen head."""
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._set_head()
+        self._draw_animated()
+
+    def seek(self, t):
+        """Jump to time t with one full redraw."""
+        self.time = min(max(t, 0.0), self.timeline.total)
+        self.shown = self.timeline.moves_done(self.time)
+        self._fill(self.drawn, self.travel, 0, self.shown)
+        self.background = None
+        self.canvas.draw_idle()
+
+    def advance(self, t):
+        """Move forward to time t, drawing only the moves finished since the last frame."""
+        t = min(max(t, 0.0), self.timeline.total)
+        if self.background is None or t < self.time:
+            self.seek(t)
+            return
+        self.time = t
+        done = self.timeline.moves_done(t)
+
+        self.canvas.restore_region(self.background)
+        if done > self.shown:
+            self._fill(self.new_drawn, self.new_travel, self.shown, done)
+            self.ax.draw_artist(self.new_travel)
+            self.ax.draw_artist(self.new_drawn)
+            self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+            self.shown = done
+        self._set_head()
+        self._draw_animated()
+        self.canvas.blit(self.ax.bbox)
@@ -0,0 +1,181 @@
+# Plot-time estimation: motion with acceleration plus pen lift and pen change costs, calibrated from real jobs
+import json
+import time
+
+import numpy as np
+
+PLOTTER_UNIT_MM = 0.025  # One HPGL plotter unit
+
+# Default model (HP 7475A); calibrate() fits the costs to logged jobs
+SLEWING_SPEED = 400  # Pen-up speed, mm/s
+DRAWING_SPEED = 100  # Pen-down speed, mm/s
+ACCELERATION = 2000  # mm/s^2, every move starts and ends at rest
+PEN_LIFT_TIME = 0.05  # Seconds per pen up or pen down
+PEN_CHANGE_TIME = 4.0  # Seconds to put a pen away and pick another from the carousel
+
+PLOT_TIME_MODEL_FILE = "plot_time_model.json"
+PLOT_TIME_LOG_FILE = "plot_times.jsonl"  # One logged job per line: features and measured seconds
+
+# Order of the calibrated coefficients and the features they multiply
+COEFFICIENTS = ['drawing_scale', 'slewing_scale', 'pen_lift_time', 'pen_change_time', 'job_overhead']
+FEATURES = ['drawing_motion', 'slewing_motion', 'pen_lifts', 'pen_changes', 'jobs']
+MIN_FIT_SAMPLES = len(COEFFICIENTS)  # Below this only one overall scale is fitted
+
+
+def move_times(lengths, speed, acceleration):
+    """Seconds for moves of the given lengths (mm) with a trapezoidal speed profile.
+
+    Moves too short to reach full speed follow a triangular profile instead.
+    """
+    lengths = np.asarray(lengths, dtype=float)
+    if acceleration <= 0:
+        return lengths / speed
+    ramp = speed * speed / acceleration  # Distance spent accelerating plus braking
+    return np.where(lengths >= ramp,
+                    lengths / speed + speed / acceleration,
+                    2 * np.sqrt(lengths / acceleration))
+
+
+class PlotTimeModel:
+    """Estimates how long a job takes on the plotter.
+
+    Motion time is computed per move from its length in mm, the pen-up or
+    pen-down speed and the acceleration. Pen lifts and pen changes add a fixed
+    cost each. Scales and costs can be fitted to measured job durations.
+    """
+
+    def __init__(self, drawing_speed=DRAWING_SPEED, slewing_speed=SLEWING_SPEED, acceleration=ACCELERATION,
+                 pen_lift_time=PEN_LIFT_TIME, pen_change_time=PEN_CHANGE_TIME, job_overhead=0.0,
+                 drawing_scale=1.0, slewing_scale=1.0):
+        self.drawing_speed = drawing_speed
+        self.slewing_speed = slewing_speed
+        self.acceleration = acceleration
+        self.pen_lift_time = pen_lift_time
+        self.pen_change_time = pen_change_time
+        self.job_overhead = job_overhead
+        self.drawing_scale = drawing_scale
+        self.slewing_scale = slewing_scale
+
+    def features(self, starts, ends, pen_down, pens):
+        """Uncalibrated quantities the estimate is built from, as a dict."""
+        lengths = np.hypot(*(ends - starts).T) * PLOTTER_UNIT_MM if len(starts) else np.empty(0)
+        moving = lengths > 0
+        drawing = moving & pen_down
+        slewing = moving & ~pen_down
+
+        # A lift or drop wherever the pen state differs from the move before (the pen starts up)
+        previous_down = np.concatenate(([False], pen_down[:-1]))
+        pen_lifts = int(np.count_nonzero(pen_down != previous_down))
+        previous_pen = np.concatenate(([0], pens[:-1]))
+        pen_changes = int(np.count_nonzero(pens != previous_pen))
+
+        return {
+            'drawing_mm': float(lengths[drawing].sum()),
+            'slewing_mm': float(lengths[slewing].sum()),
+            'drawing_motion': float(move_times(lengths[drawing], self.drawing_speed, self.acceleration).sum()),
+            'slewing_motion': float(move_times(lengths[slewing], self.slewing_speed, self.acceleration).sum()),
+            'pen_lifts': pen_lifts,
+            'pen_changes': pen_changes,
+            'jobs': 1,
+        }
+
+    def move_durations(self, program):
+        """Seconds for each move of a parsed HPGLProgram, with the pen lift or pen change before it.
+
+        Adds up to the estimate's total less the job overhead.
+        """
+        pen_down, pens = program.pen_down, program.pen
+        lengths = np.hypot(*(program.ends() - program.starts()).T) * PLOTTER_UNIT_MM
+        speeds = np.where(pen_down, self.drawing_speed, self.slewing_speed)
+        scales = np.where(pen_down, self.drawing_scale, self.slewing_scale)
+        durations = move_times(lengths, speeds, self.acceleration) * scales
+
+        previous_down = np.concatenate(([False], pen_down[:-1]))
+        previous_pen = np.concatenate(([0], pens[:-1]))
+        durations += self.pen_lift_time * (pen_down != previous_down)
+        durations += self.pen_change_time * (pens != previous_pen)
+        return durations
+
+    def program_features(self, program):
+        return self.features(program.starts(), program.ends(), program.pen_down, program.pen)
+
+    def coefficients(self):
+        return np.array([getattr(self, name) for name in COEFFICIENTS], dtype=float)
+
+    def estimate_features(self, features):
+        """Estimated seconds and their breakdown for a features dict."""
+        parts = self.coefficients() * np.array([features[name] for name in FEATURES], dtype=float)
+        breakdown = dict(zip(['drawing', 'slewing', 'pen_lifts', 'pen_changes', 'overhead'], parts.tolist()))
+        breakdown['total'] = float(parts.sum())
+        return breakdown
+
+    def estimate(self, program):
+        """Estimated seconds for a parsed HPGLProgram, with a breakdown and the distances drawn/slewed in mm."""
+        features = self.program_features(program)
+        estimate = self.estimate_features(features)
+        estimate['drawing_mm'] = features['drawing_mm']
+        estimate['slewing_mm'] = features['slewing_mm']
+        return estimate
+
+    def calibrate(self, samples):
+        """Fit the model to (features, measured_seconds) samples; returns the mean absolute error.
+
+        With at least MIN_FIT_SAMPLES jobs every coefficient is fitted by least
+        squares (negative results are clamped to 0); with fewer, the current
+        coefficients are scaled by one common factor.
+        """
+        if not samples:
+            return None
+        matrix = np.array([[features[name] for name in FEATURES] for features, _ in samples], dtype=float)
+        measured = np.array([seconds for _, seconds in samples], dtype=float)
+
+        if len(samples) >= MIN_FIT_SAMPLES:
+            fitted, *_ = np.linalg.lstsq(matrix, measured, rcond=None)
+            coefficients = np.clip(fitted, 0, None)
+        else:
+            predicted = matrix @ self.coefficients()
+            scale = measured.sum() / predicted.sum() if predicted.sum() > 0 else 1.0
+            coefficients = self.coefficients() * scale
+
+        for name, value in zip(COEFFICIENTS, coefficients):
+            setattr(self, name, float(value))
+        return float(np.abs(matrix @ self.coefficients() - measured).mean())
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in
+                ['drawing_speed', 'slewing_speed', 'acceleration'] + COEFFICIENTS}
+
+    def save(self, filename=PLOT_TIME_MODEL_FILE):
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, filename=PLOT_TIME_MODEL_FILE):
+        """Model saved by save(), or the default model if there is none."""
+        try:
+            with open(filename) as f:
+                return cls(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return cls()
+
+
+def log_job_time(features, seconds, filename=PLOT_TIME_LOG_FILE):
+    """Append a finished job's features and measured plotting time to the log."""
+    with open(filename, "a") as f:
+        f.write(json.dumps({'features': features, 'seconds': seconds, 'logged': time.time()}) + "\n")
+
+
+def load_job_times(filename=PLOT_TIME_LOG_FILE):
+    """(features, seconds) samples from the log; unreadable lines are skipped."""
+    samples = []
+    try:
+        with open(filename) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    samples.append((entry['features'], float(entry['seconds'])))
+                except (ValueError, KeyError):
+                    continue
+    except OSError:
+        pass
+    return samples
@@ -0,0 +1,220 @@
+# Background plot sender: streams a job off the Tk thread with pause, resume and cancel
+import bisect
+import queue
+import threading
+import time
+
+from plotter_stream import ESC, HANDSHAKE_BUFFER, HPGLStreamer
+
+QUEUE_SIZE = 256  # Commands buffered between the feeder and the sender thread
+CHECKPOINT_INTERVAL = 2.0  # Seconds between checkpoint callbacks
+# Without buffer queries the plotter may still hold a full 7475A buffer of unplotted bytes
+UNCONFIRMED_BYTES = 1024
+# Abort graphic (discard the plotter buffer), then lift the pen and put it away
+ABORT_SEQUENCE = ESC + b'.K' + b'PU;SP0;\n'
+
+_END = object()
+
+
+class PlotWorker:
+    """Runs one HPGL job on a worker thread.
+
+    A feeder thread pushes commands (any iterable of byte strings) into a bounded
+    queue and the sender thread streams them with HPGLStreamer. The Tk side polls
+    progress() from root.after and calls pause(), resume() or cancel().
+
+    checkpoint(acked), if given, is called from the sender thread every
+    CHECKPOINT_INTERVAL seconds and once when the job ends, with the number of
+    commands the plotter is known to have taken (all of them once finished).
+    """
+
+    def __init__(self, connection, commands, total=None, handshake=HANDSHAKE_BUFFER, checkpoint=None):
+        self.streamer = HPGLStreamer(connection, handshake)
+        self.commands = commands
+        self.total = total if total is not None else len(commands)
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.checkpoint = checkpoint
+        self._last_checkpoint = 0.0
+        self.state = 'idle'  # running, paused, cancelled, finished or failed
+        self.error = None
+        self.commands_sent = 0
+        self.started_at = None
+        self.finished_at = None
+        self.paused_seconds = 0.0  # Time spent paused, left out of elapsed
+        self._paused_at = None
+        self._command_ends = []  # Cumulative byte offset at the end of each sent command
+        self._resume = threading.Event()
+        self._resume.set()
+        self._cancel = threading.Event()
+        self._stopped = threading.Event()  # Set once the sender has ended, for whatever reason
+        self._feeder = None
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        self.state = 'running'
+        self.started_at = time.monotonic()
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+        self._threads = [self._feeder, threading.Thread(target=self._run, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def pause(self):
+        if self.state == 'running':
+            self._resume.clear()
+            self._paused_at = time.monotonic()
+            self.state = 'paused'
+
+    def resume(self):
+        if self.state == 'paused':
+            self.paused_seconds += time.monotonic() - self._paused_at
+            self._paused_at = None
+            self.state = 'running'
+            self._resume.set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._resume.set()
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    @property
+    def done(self):
+        return self.state in ('cancelled', 'finished', 'failed')
+
+    def _put(self, item):
+        while not (self._cancel.is_set() or self._stopped.is_set()):
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self):
+        for command in self.commands:
+            if not self._put(command):
+                return  # Cancelled, or the sender stopped (e.g. failed) and nobody reads the queue
+        self._put(_END)
+
+    def _get(self):
+        while not self._cancel.is_set():
+            try:
+                return self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _should_stop(self):
+        return self._cancel.is_set() or not self._resume.is_set()
+
+    def _confirmed_commands(self):
+        """Commands certainly taken by the plotter, for checkpoints."""
+        confirmed = self.streamer.acked_bytes
+        if self.streamer.handshake != HANDSHAKE_BUFFER:
+            confirmed -= UNCONFIRMED_BYTES
+        with self._lock:
+            return bisect.bisect_right(self._command_ends, confirmed)
+
+    def _save_checkpoint(self, force=False, finished=False):
+        if self.checkpoint is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_checkpoint >= CHECKPOINT_INTERVAL:
+            self._last_checkpoint = now
+            self.checkpoint(self.commands_sent if finished else self._confirmed_commands())
+
+    def _run(self):
+        streamer = self.streamer
+        state = 'failed'
+        try:
+            streamer.configure()
+            if streamer.handshake == HANDSHAKE_BUFFER:
+                streamer.buffer_size = streamer.query_buffer_size()
+
+            pending = None
+            while True:
+                self._resume.wait()
+                if self._cancel.is_set():
+                    streamer.write(ABORT_SEQUENCE)
+                    state = 'cancelled'
+                    return
+
+                if pending is None:
+                    pending = self._get()
+                    if pending is None:
+                        continue  # Cancelled while waiting for the feeder
+                if pending is _END:
+                    if streamer.handshake != HANDSHAKE_BUFFER:
+                        break
+                    # Wait for the buffer to empty so the last commands are acknowledged too
+                    if streamer.wait_for_space(streamer.buffer_size - streamer.safety_margin, self._should_stop):
+                        break
+                    continue
+                if streamer.buffer_size and len(pending) + streamer.safety_margin > streamer.buffer_size:
+                    raise ValueError(f"A {len(pending)} byte command does not fit the plotter buffer")
+
+                budget = streamer.wait_for_space(len(pending), self._should_stop)
+                if budget == 0:
+                    continue  # Paused or cancelled while the buffer was full
+
+                # Pack queued commands into one write while they fit
+                batch = [pending]
+                size = len(pending)
+                pending = None
+                while True:
+                    try:
+                        command = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if command is _END or size + len(command) > budget:
+                        pending = command
+                        break
+                    batch.append(command)
+                    size += len(command)
+
+                offset = streamer.bytes_sent
+                streamer.write(b''.join(batch))
+                with self._lock:
+                    for command in batch:
+                        offset += len(command)
+                        self._command_ends.append(offset)
+                    self.commands_sent += len(batch)
+                self._save_checkpoint()
+
+            state = 'finished'
+        except Exception as e:
+            self.error = e
+        finally:
+            # Release the feeder (it may be blocked on a full queue) before reporting the outcome
+            self._stopped.set()
+            self._feeder.join()
+            self.finished_at = time.monotonic()
+            try:
+                self._save_checkpoint(force=True, finished=state == 'finished')
+            except OSError as e:
+                self.error = self.error or e
+            self.state = state
+
+    def progress(self):
+        """Snapshot for the UI: counts, bytes, elapsed seconds (pauses excluded) and ETA (or None)."""
+        with self._lock:
+            sent = self.commands_sent
+            acked = bisect.bisect_right(self._command_ends, self.streamer.acked_bytes)
+        end = self._paused_at or self.finished_at or time.monotonic()
+        elapsed = end - self.started_at - self.paused_seconds if self.started_at else 0.0
+        eta = None
+        if acked and self.total and not self.done:
+            eta = elapsed / acked * (self.total - acked)
+        return {
+            'state': self.state,
+            'commands_sent': sent,
+            'commands_acked': acked,
+            'total': self.total,
+            'bytes_sent': self.streamer.bytes_sent,
+            'elapsed': elapsed,
+            'eta': eta,
+            'error': self.error,
+        }
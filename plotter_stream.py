@@ -0,0 +1,166 @@
+# Buffer-aware HPGL streaming: keeps the plotter buffer full without fixed sleeps
+import time
+
+ESC = b'\x1b'
+
+# Handshake strategies
+HANDSHAKE_BUFFER = 'buffer'    # Poll free buffer space with ESC.B before each write
+HANDSHAKE_XONXOFF = 'xonxoff'  # Plotter sends XOFF/XON, the serial driver pauses writes
+HANDSHAKE_RTSCTS = 'rtscts'    # Hardware flow control on the CTS line
+
+HANDSHAKES = [HANDSHAKE_BUFFER, HANDSHAKE_XONXOFF, HANDSHAKE_RTSCTS]
+
+# Device-control escape sequences (HP 7475A)
+OUTPUT_BUFFER_SPACE = ESC + b'.B'  # Reply: free bytes in the buffer
+OUTPUT_BUFFER_SIZE = ESC + b'.L'   # Reply: total buffer size
+# Xon-Xoff handshake: send XON (17) once 81 bytes are free, XOFF (19) when full
+XONXOFF_SETUP = ESC + b'.I81;;17:' + ESC + b'.N;19:'
+
+BUFFER_SAFETY_MARGIN = 16  # Bytes left free to absorb miscounts
+POLL_INTERVAL = 0.05  # Seconds to wait when the buffer is full
+WRITE_CHUNK = 256  # Bytes per write for flow-controlled handshakes
+MAX_WRITE_SECONDS = 0.5  # Longest a single write may take on the line, keeps replies within REPLY_TIMEOUT
+REPLY_TIMEOUT = 1.0  # Seconds allowed for a reply once everything written before it is on the wire
+DEFAULT_BAUD_RATE = 9600
+
+
+def split_commands(hpgl_code):
+    """Split HPGL code into the byte strings that are sent, one per line.
+
+    Line breaks are not sent: commands are ';'-terminated, so they would only
+    cost serial bytes.
+    """
+    return [line.strip().encode() for line in hpgl_code.splitlines() if line.strip()]
+
+
+class HPGLStreamer:
+    """Streams HPGL commands to an open serial connection.
+
+    With the buffer handshake the plotter is asked for its free buffer space and
+    as many whole commands as fit are written in one go; with XON/XOFF or RTS/CTS
+    the serial driver blocks writes and commands are written in large chunks.
+    """
+
+    def __init__(self, connection, handshake=HANDSHAKE_BUFFER, safety_margin=BUFFER_SAFETY_MARGIN,
+                 poll_interval=POLL_INTERVAL):
+        if handshake not in HANDSHAKES:
+            raise ValueError(f"Unknown handshake '{handshake}'")
+        self.connection = connection
+        self.handshake = handshake
+        self.safety_margin = safety_margin
+        self.poll_interval = poll_interval
+        self.bytes_sent = 0
+        self.queries = 0
+        self.buffer_size = None
+        self.buffered_bytes = 0  # Bytes still in the plotter buffer at the last query
+        self.acked_bytes = 0  # Bytes the plotter has taken out of its buffer
+        # 8N1: ten bits per byte
+        self.line_rate = (getattr(connection, 'baudrate', None) or DEFAULT_BAUD_RATE) / 10
+        self._line_busy_until = 0.0  # When the bytes written so far are expected to have left the port
+
+    def _on_line(self, size):
+        """Account for size bytes written; flush() may return before they are actually sent."""
+        now = time.monotonic()
+        self._line_busy_until = max(now, self._line_busy_until) + size / self.line_rate
+
+    def max_write_bytes(self):
+        """Largest write that clears the line within MAX_WRITE_SECONDS."""
+        return max(1, int(self.line_rate * MAX_WRITE_SECONDS))
+
+    def _query(self, escape):
+        """Send an output escape sequence and return the plotter's numeric reply.
+
+        The reply cannot come before every byte written earlier has crossed the
+        line, so the wait grows with the bytes still in flight.
+        """
+        self.connection.reset_input_buffer()
+        self.connection.write(escape)
+        self.connection.flush()
+        self._on_line(len(escape))
+        deadline = self._line_busy_until + REPLY_TIMEOUT
+        reply = self.connection.read_until(b'\r')
+        while not reply.endswith(b'\r') and time.monotonic() < deadline:
+            reply += self.connection.read_until(b'\r')
+        self.queries += 1
+        try:
+            return int(reply.strip())
+        except ValueError:
+            raise IOError(f"No reply from plotter to {escape!r} (got {reply!r})")
+
+    def query_buffer_space(self):
+        return self._query(OUTPUT_BUFFER_SPACE)
+
+    def query_buffer_size(self):
+        return self._query(OUTPUT_BUFFER_SIZE)
+
+    def configure(self):
+        """Set the serial port and plotter up for the chosen handshake."""
+        self.connection.xonxoff = self.handshake == HANDSHAKE_XONXOFF
+        self.connection.rtscts = self.handshake == HANDSHAKE_RTSCTS
+        if self.handshake == HANDSHAKE_XONXOFF:
+            self.connection.write(XONXOFF_SETUP)
+            self.connection.flush()
+
+    def write(self, data):
+        self.connection.write(data)
+        self.connection.flush()
+        self._on_line(len(data))
+        self.bytes_sent += len(data)
+        if self.handshake != HANDSHAKE_BUFFER:
+            # Best known: bytes that have left the serial driver's output queue
+            self.acked_bytes = self.bytes_sent - self.connection.out_waiting
+
+    def check_fits(self, commands):
+        """Raise if a command could never fit into the plotter buffer."""
+        if self.handshake != HANDSHAKE_BUFFER:
+            return
+        self.buffer_size = self.query_buffer_size()
+        longest = max((len(command) for command in commands), default=0)
+        if longest + self.safety_margin > self.buffer_size:
+            raise ValueError(f"A {longest} byte command does not fit the {self.buffer_size} byte plotter buffer")
+
+    def wait_for_space(self, needed, should_stop=None):
+        """Return how many bytes may be written now, waiting until needed bytes fit.
+
+        The budget is capped at max_write_bytes() (but never below needed).
+        Returns 0 if should_stop() becomes true while waiting.
+        """
+        if self.handshake != HANDSHAKE_BUFFER:
+            return max(min(WRITE_CHUNK, self.max_write_bytes()), needed)
+
+        while True:
+            free = self.query_buffer_space()
+            self.buffered_bytes = max(0, (self.buffer_size or free) - free)
+            self.acked_bytes = self.bytes_sent - self.buffered_bytes
+            budget = free - self.safety_margin
+            if budget >= needed:
+                return max(min(budget, self.max_write_bytes()), needed)
+            if should_stop and should_stop():
+                return 0
+            time.sleep(self.poll_interval)
+
+    def send(self, commands, start=0, on_progress=None):
+        """Send commands[start:]; returns the index after the last command sent.
+
+        on_progress(sent, total, bytes_sent) is called after every write.
+        """
+        total = len(commands)
+        index = start
+        self.check_fits(commands[start:])
+
+        while index < total:
+            budget = self.wait_for_space(len(commands[index]))
+
+            # Pack as many whole commands as fit into this write
+            batch_end = index
+            size = 0
+            while batch_end < total and size + len(commands[batch_end]) <= budget:
+                size += len(commands[batch_end])
+                batch_end += 1
+
+            self.write(b''.join(commands[index:batch_end]))
+            index = batch_end
+            if on_progress:
+                on_progress(index, total, self.bytes_sent)
+
+        return index
@@ -0,0 +1,127 @@
+# Level-of-detail geometry for the tool-path preview: per-zoom decimation and viewport culling
+import numpy as np
+
+LOD_FINEST_PIXELS = 8192  # Screen width (px) across the job that the finest decimated level is made for
+LOD_LEVELS = 6  # Each level halves the resolution of the one before
+LOD_PIXEL_ERROR = 0.5  # Grid cell size of a level, in screen pixels
+
+
+def stroke_bboxes(points, offsets):
+    """(n, 4) min_x, min_y, max_x, max_y of the strokes points[offsets[i]:offsets[i + 1]]."""
+    if len(offsets) < 2:
+        return np.empty((0, 4))
+    starts = offsets[:-1]
+    return np.column_stack((np.minimum.reduceat(points, starts), np.maximum.reduceat(points, starts)))
+
+
+def intersects(bboxes, view):
+    """Mask of the bboxes that overlap view (min_x, min_y, max_x, max_y)."""
+    return ((bboxes[:, 0] <= view[2]) & (bboxes[:, 2] >= view[0])
+            & (bboxes[:, 1] <= view[3]) & (bboxes[:, 3] >= view[1]))
+
+
+def segments_intersect(segments, view):
+    """Mask of the (n, 2, 2) segments that cross view, not just overlap it with their bbox."""
+    bboxes = np.concatenate((segments.min(axis=1), segments.max(axis=1)), axis=1)
+    mask = intersects(bboxes, view)
+    # Separating axis along the segment normal: all view corners on one side means a miss
+    start = segments[:, 0]
+    normal = (segments[:, 1] - start)[:, ::-1] * (-1, 1)
+    corners = np.array([[view[0], view[1]], [view[2], view[1]], [view[0], view[3]], [view[2], view[3]]])
+    sides = np.einsum('nk,nck->nc', normal, corners[None, :, :] - start[:, None, :])
+    return mask & (sides.min(axis=1) <= 0) & (sides.max(axis=1) >= 0)
+
+
+def _split(points, offsets):
+    return np.split(points, offsets[1:-1]) if len(offsets) > 1 else []
+
+
+class ToolPathLOD:
+    """Multi-resolution tool path for interactive previews.
+
+    strokes maps each pen to its pen-down polylines and pen_up holds the pen-up
+    moves as (n, 2, 2) segments. Level k is meant for a pixel size of
+    extent * 2**k / LOD_FINEST_PIXELS: stroke points are snapped to a grid of
+    that size and runs within one cell merged, strokes smaller than a cell are
+    reduced to one mark per cell, and shorter pen-up moves are dropped. All of
+    it is vectorized over the concatenated points of every stroke. Levels are
+    built the first time a zoom needs them; visible() culls a level against the
+    viewport.
+    """
+
+    def __init__(self, strokes, pen_up):
+        # Per pen: every stroke's points concatenated, with stroke start offsets
+        self.points, self.offsets = {}, {}
+        for pen, pen_strokes in strokes.items():
+            self.points[pen] = np.concatenate(pen_strokes) if pen_strokes else np.empty((0, 2))
+            self.offsets[pen] = np.concatenate(([0], np.cumsum([len(points) for points in pen_strokes])))
+        self.bboxes = {pen: stroke_bboxes(self.points[pen], self.offsets[pen]) for pen in self.points}
+        self.pen_up = np.asarray(pen_up, dtype=float).reshape(-1, 2, 2)
+
+        corners = [self.pen_up.reshape(-1, 2)] + [bboxes.reshape(-1, 2) for bboxes in self.bboxes.values()]
+        corners = np.concatenate(corners)
+        if len(corners):
+            self.bounds = (*corners.min(axis=0), *corners.max(axis=0))
+        else:
+            self.bounds = (0.0, 0.0, 1.0, 1.0)
+        self.extent = max(self.bounds[2] - self.bounds[0], self.bounds[3] - self.bounds[1], 1.0)
+
+        full_strokes = {pen: _split(self.points[pen], self.offsets[pen]) for pen in self.points}
+        self._levels = {None: (full_strokes, self.bboxes, self.pen_up)}
+
+    def tolerance(self, level):
+        return self.extent * 2 ** level / LOD_FINEST_PIXELS
+
+    def level_for(self, pixel_size):
+        """Coarsest level whose cells stay under LOD_PIXEL_ERROR pixels, None for full detail."""
+        allowed = pixel_size * LOD_PIXEL_ERROR
+        level = None
+        for k in range(LOD_LEVELS):
+            if self.tolerance(k) <= allowed:
+                level = k
+        return level
+
+    def _decimate(self, points, offsets, bboxes, tolerance):
+        size = np.maximum(bboxes[:, 2] - bboxes[:, 0], bboxes[:, 3] - bboxes[:, 1])
+        large = size >= tolerance
+
+        # Keep a point where it enters a new grid cell, plus every stroke's first and last point
+        cells = np.floor(points / tolerance).astype(np.int64)
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(cells[1:] != cells[:-1], axis=1)
+        keep[offsets[:-1]] = True
+        keep[offsets[1:] - 1] = True
+        stroke_of_point = np.repeat(np.arange(len(bboxes)), np.diff(offsets))
+        keep &= large[stroke_of_point]
+        kept_offsets = np.concatenate(([0], np.cumsum(np.bincount(stroke_of_point[keep], minlength=len(bboxes))[large])))
+        strokes = _split(points[keep], kept_offsets)
+
+        # Strokes smaller than a cell: one diagonal mark per occupied cell
+        small_index = np.flatnonzero(~large)
+        centers = (bboxes[small_index, :2] + bboxes[small_index, 2:]) / 2
+        _, first = np.unique(np.floor(centers / tolerance).astype(np.int64), axis=0, return_index=True)
+        marks = bboxes[small_index[np.sort(first)]]
+
+        return strokes + list(marks.reshape(-1, 2, 2)), np.concatenate((bboxes[large], marks))
+
+    def _build_level(self, level):
+        tolerance = self.tolerance(level)
+        strokes, bboxes = {}, {}
+        for pen in self.points:
+            strokes[pen], bboxes[pen] = self._decimate(self.points[pen], self.offsets[pen], self.bboxes[pen], tolerance)
+        lengths = np.hypot(*(self.pen_up[:, 1] - self.pen_up[:, 0]).T)
+        return strokes, bboxes, self.pen_up[lengths >= tolerance]
+
+    def level_geometry(self, level):
+        if level not in self._levels:
+            self._levels[level] = self._build_level(level)
+        return self._levels[level]
+
+    def visible(self, view, pixel_size):
+        """(level, {pen: strokes}, pen_up segments) to draw for a viewport and pixel size."""
+        level = self.level_for(pixel_size)
+        strokes, bboxes, pen_up = self.level_geometry(level)
+        visible_strokes = {}
+        for pen, pen_strokes in strokes.items():
+            visible_strokes[pen] = [pen_strokes[i] for i in np.flatnonzero(intersects(bboxes[pen], view))]
+        return level, visible_strokes, pen_up[segments_intersect(pen_up, view)]
@@ -0,0 +1,62 @@
+# Coalesces bursts of redraw requests (e.g. slider drags) into one render per frame
+import time
+
+FRAME_INTERVAL_MS = 33  # ~30 redraws per second
+
+_NOTHING = object()
+
+
+class RedrawScheduler:
+    """Run render(layer) at most once per frame interval using root.after.
+
+    Requests that arrive while a render is already pending are merged into it:
+    repeated requests for the same layer keep the single-layer redraw, requests
+    for different layers widen it to a full redraw (layer None).
+    """
+
+    def __init__(self, root, render, interval_ms=FRAME_INTERVAL_MS):
+        self.root = root
+        self.render = render
+        self.interval_ms = interval_ms
+        self.pending_layer = _NOTHING
+        self.after_id = None
+        self.last_render = 0.0
+        self.requested = 0
+        self.rendered = 0
+        self.coalesced = 0
+
+    def request(self, layer=None):
+        self.requested += 1
+
+        if self.pending_layer is _NOTHING:
+            self.pending_layer = layer
+        else:
+            self.coalesced += 1
+            if self.pending_layer != layer:
+                self.pending_layer = None
+
+        if self.after_id is None:
+            elapsed_ms = (time.perf_counter() - self.last_render) * 1000
+            delay = max(0, int(self.interval_ms - elapsed_ms))
+            self.after_id = self.root.after(delay, self._fire)
+
+    def flush(self):
+        """Render any pending request immediately."""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self._fire()
+
+    def _fire(self):
+        self.after_id = None
+        layer = self.pending_layer
+        self.pending_layer = _NOTHING
+        if layer is _NOTHING:
+            return
+
+        self.last_render = time.perf_counter()
+        self.rendered += 1
+        self.render(layer)
+
+    def report(self):
+        return (f"Redraws: {self.requested} requested, {self.rendered} rendered, "
+                f"{self.coalesced} coalesced")
@@ -0,0 +1,57 @@
+# Ramer–Douglas–Peucker polyline simplification on plotter-unit arrays
+import numpy as np
+
+# Default tolerance in plotter units (1 unit = 0.025 mm); 0 disables the stage
+SIMPLIFY_TOLERANCE = 1.0
+
+
+def _point_segment_distances(points, start, end):
+    """Distance of every point to the segment start-end."""
+    direction = end - start
+    length_sq = float(direction @ direction)
+    if length_sq == 0:
+        return np.hypot(*(points - start).T)
+    t = np.clip((points - start) @ direction / length_sq, 0, 1)
+    nearest = start + t[:, None] * direction
+    return np.hypot(*(points - nearest).T)
+
+
+def simplify_polyline(points, tolerance):
+    """Return points with every vertex removed that RDP finds within tolerance.
+
+    The split search is iterative and each range's distances are computed in one
+    NumPy call. Endpoints are always kept, so closed polylines stay closed.
+    """
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return points
+
+    coords = np.asarray(points, dtype=float)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _point_segment_distances(coords[first + 1:last], coords[first], coords[last])
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return points[keep]
+
+
+def simplify_paths(paths, tolerance=SIMPLIFY_TOLERANCE):
+    """Simplify (pen, points) paths; returns (paths, points_removed)."""
+    simplified = []
+    removed = 0
+    for pen, points in paths:
+        reduced = simplify_polyline(points, tolerance)
+        removed += len(points) - len(reduced)
+        simplified.append((pen, reduced))
+    return simplified, removed
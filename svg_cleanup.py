@@ -0,0 +1,34 @@
+# SVG post-processing in memory: strips clipPath rectangles and empty clipPaths, then writes the file once
+import re
+
+from svg_reader import open_svg
+from svg_writer import write_svg
+
+# A whole <clipPath> element with its content
+_CLIP_PATH = re.compile(r'<clipPath\b[^>]*>(.*?)</clipPath>', re.DOTALL)
+# A self-closing or empty <rect> element
+_RECT = re.compile(r'<rect\b[^>]*?(?:/>|>\s*</rect>)', re.DOTALL)
+
+
+def _clean_clip_path(match):
+    content = _RECT.sub('', match.group(1))
+    if not content.strip():
+        return ''  # Nothing left to clip with: drop the element
+    start, end = match.start(1) - match.start(), match.end(1) - match.start()
+    return match.group(0)[:start] + content + match.group(0)[end:]
+
+
+def clean_svg(svg_text):
+    """Remove rectangles inside clipPath elements and the clipPaths left empty, in one pass."""
+    return _CLIP_PATH.sub(_clean_clip_path, svg_text)
+
+
+def clean_svg_file(svg_filename):
+    """Apply clean_svg to an SVG (or .svgz) file in place; returns False if there was nothing to remove."""
+    with open_svg(svg_filename) as f:
+        svg_text = f.read().decode('utf-8')
+    cleaned = clean_svg(svg_text)
+    if cleaned == svg_text:
+        return False
+    write_svg(svg_filename, cleaned)
+    return True
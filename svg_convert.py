@@ -0,0 +1,115 @@
+# SVG to plot paths across a process pool: paths are parsed and flattened in parallel, merged in file order
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from svg.path import parse_path
+
+from flatten import flatten_path
+from hpgl import dedupe_points, nearest_pen, HPGL_MAX_UNITS_X, HPGL_MAX_UNITS_Y
+from svg_reader import SVGReader, apply_matrix
+
+CONVERT_CHUNK_PATHS = 256  # SVG paths per task sent to a worker process
+CONVERT_WORKERS = os.cpu_count() or 1  # Default worker count for files large enough for the pool
+# Fewer paths are converted in-process: each spawned worker spends about half a second importing
+# numpy and matplotlib, more than the whole conversion of a few thousand paths takes
+CONVERT_POOL_MIN_PATHS = 20000
+# Spawned on every platform: forking a process with Tk and worker threads running is unsafe
+# (main.py keeps the GUI under its __main__ guard so workers do not build it again)
+POOL_START_METHOD = 'spawn'
+
+
+def flatten_svg_path(path_data, matrix, pen_number, tolerance, uniform_scale):
+    """(pen, points) plot paths in plotter units for one SVG path."""
+    try:
+        path_obj = parse_path(path_data)
+    except Exception as e:
+        print(f"Error parsing path: {e}")
+        return []
+
+    # Flatten to polylines (contiguous segments chained) with the chord error
+    # tolerance converted from plotter units to the path's own units, then
+    # map them through the path's transform onto the canvas
+    path_scale = uniform_scale * (np.linalg.norm(matrix[:2, :2], 2) or 1.0)
+    plot_paths = []
+    for polyline in flatten_path(path_obj, tolerance / path_scale):
+        points = apply_matrix(polyline, matrix) * uniform_scale
+        plot_paths.append((pen_number, dedupe_points(points.astype(int))))
+    return plot_paths
+
+
+def _convert_chunk(chunk, tolerance, uniform_scale):
+    plot_paths = []
+    for path_data, matrix, pen_number in chunk:
+        plot_paths.extend(flatten_svg_path(path_data, matrix, pen_number, tolerance, uniform_scale))
+    return plot_paths
+
+
+def _read_chunks(svg_reader, chunk_size):
+    """Chunks of unique (d, matrix, pen) paths, in file order."""
+    seen_paths = set()
+    chunk = []
+    for path_data, stroke, matrix in svg_reader:
+        # The same outline under a different transform is a different shape
+        path_key = (path_data, matrix.tobytes())
+        if path_key in seen_paths:
+            continue  # skip duplicates
+        seen_paths.add(path_key)
+
+        # Pen whose color is nearest to the resolved stroke color
+        chunk.append((path_data, matrix, nearest_pen(stroke)))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def svg_to_plot_paths(svg_filename, tolerance, workers=CONVERT_WORKERS, chunk_size=CONVERT_CHUNK_PATHS,
+                      pool_min_paths=CONVERT_POOL_MIN_PATHS):
+    """(pen, points) plot paths for an SVG file, scaled uniformly to fit the plotter.
+
+    The file is read once in the calling process (deduplicating paths and
+    resolving pens). Files with fewer than pool_min_paths unique paths, or a
+    single worker, are converted in-process; larger ones are parsed and
+    flattened in chunks on up to workers processes, the chunks past the first
+    pool_min_paths paths submitted as soon as they are read. Results are merged
+    back in file order, so the output does not depend on the worker count.
+    """
+    svg_reader = SVGReader(svg_filename)
+    chunks = _read_chunks(svg_reader, chunk_size)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return []
+
+    # Scale to fit canvas (known once the root element has been read)
+    canvas_width_px, canvas_height_px = svg_reader.canvas_size
+    x_scale = HPGL_MAX_UNITS_X / canvas_width_px
+    y_scale = HPGL_MAX_UNITS_Y / canvas_height_px
+    uniform_scale = min(x_scale, y_scale)
+    print(f"Uniform scale factor: {uniform_scale}")
+
+    # Read ahead until the file is known to be large enough for the pool
+    read_ahead = [first_chunk]
+    read_paths = len(first_chunk)
+    while workers > 1 and read_paths < pool_min_paths:
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        read_ahead.append(chunk)
+        read_paths += len(chunk)
+
+    if workers <= 1 or read_paths < pool_min_paths:
+        results = [_convert_chunk(chunk, tolerance, uniform_scale) for chunk in itertools.chain(read_ahead, chunks)]
+    else:
+        context = multiprocessing.get_context(POOL_START_METHOD)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            # Chunks are submitted while the file is still being read; collecting the
+            # futures in submission order keeps the file order whatever order they finish in
+            futures = [executor.submit(_convert_chunk, chunk, tolerance, uniform_scale)
+                       for chunk in itertools.chain(read_ahead, chunks)]
+            results = [future.result() for future in futures]
+
+    return [plot_path for result in results for plot_path in result]
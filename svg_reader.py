@@ -0,0 +1,276 @@
+# Streaming SVG reader: one iterparse pass yields paths with their resolved stroke and transform matrix
+import gzip
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+# Containers whose paths are never drawn themselves
+HIDDEN_ELEMENTS = ('defs', 'clipPath', 'mask', 'pattern', 'marker', 'symbol')
+
+_STROKE_STYLE = re.compile(r'(?:^|;)\s*stroke\s*:\s*([^;]+)')
+_NUMBER = re.compile(r'[-+]?(?:\d*\.\d+|\d+\.?)(?:[eE][-+]?\d+)?')
+_TRANSFORM = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_CSS_RULE = re.compile(r'([^{}]+)\{([^}]*)\}')
+# Simple selectors only: optional tag or '*', then any .class / #id parts
+_CSS_SELECTOR = re.compile(r'(\*|[\w-]+)?((?:[.#][\w-]+)*)')
+# Start tags (with an optional namespace prefix) found by the raw scan for late stylesheets
+_PATH_TAG = re.compile(rb'<(?:[\w.-]+:)?path[\s/>]')
+_STYLE_TAG = re.compile(rb'<(?:[\w.-]+:)?style[\s/>]')
+SCAN_BLOCK_SIZE = 1 << 16
+
+
+def _local_name(tag):
+    """Tag without its namespace ('{http://www.w3.org/2000/svg}path' -> 'path')."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def open_svg(filename):
+    """Binary file object for an .svg file, or the decompressed content of an .svgz."""
+    if filename.lower().endswith('.svgz'):
+        return gzip.open(filename, 'rb')
+    return open(filename, 'rb')
+
+
+def convert_to_pixels(value_str):
+    try:
+        if not value_str or value_str.strip() == "":
+            return None
+        value_str = value_str.strip()
+        if value_str.endswith('px'):
+            return float(value_str[:-2])
+        elif value_str.endswith('pt'):
+            return float(value_str[:-2]) * 1.333
+        elif value_str.endswith('mm'):
+            return float(value_str[:-2]) * 3.7795275591
+        elif value_str.endswith('cm'):
+            return float(value_str[:-2]) * 37.795275591
+        elif value_str.endswith('in'):
+            return float(value_str[:-2]) * 96
+        elif value_str.endswith('%'):
+            print(f"Warning: Percentage unit '{value_str}' not supported. Returning None.")
+            return None
+        else:
+            return float(value_str)
+    except ValueError:
+        print(f"Could not parse dimension '{value_str}'. Returning None.")
+        return None
+
+
+def canvas_size(svg_element):
+    """(width, height) in pixels of an <svg> element, falling back to its viewBox."""
+    width = svg_element.get('width', '')
+    height = svg_element.get('height', '')
+    print(f"SVG raw width: '{width}', height: '{height}'")
+
+    width_px = convert_to_pixels(width)
+    height_px = convert_to_pixels(height)
+
+    # Fallback to viewBox if dimensions fail
+    if not width_px or not height_px or width_px <= 0 or height_px <= 0:
+        view_box = svg_element.get('viewBox')
+        if view_box:
+            print("Falling back to viewBox dimensions.")
+            parts = view_box.replace(',', ' ').split()
+            if len(parts) == 4:
+                width_px = float(parts[2])
+                height_px = float(parts[3])
+
+    return width_px, height_px
+
+
+def transform_matrix(name, values):
+    """3x3 matrix of one SVG transform function; wrong argument counts give the identity."""
+    matrix = np.identity(3)
+    if name == 'matrix' and len(values) == 6:
+        matrix[:2] = np.array(values).reshape(3, 2).T
+    elif name == 'translate' and len(values) in (1, 2):
+        matrix[:2, 2] = values[0], values[1] if len(values) == 2 else 0.0
+    elif name == 'scale' and len(values) in (1, 2):
+        matrix[0, 0], matrix[1, 1] = values[0], values[-1]
+    elif name == 'rotate' and len(values) in (1, 3):
+        angle = np.deg2rad(values[0])
+        matrix[:2, :2] = [[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]]
+        if len(values) == 3:
+            # Rotation about (cx, cy): translate(cx, cy) rotate(a) translate(-cx, -cy)
+            center = np.array(values[1:])
+            matrix[:2, 2] = center - matrix[:2, :2] @ center
+    elif name == 'skewX' and len(values) == 1:
+        matrix[0, 1] = np.tan(np.deg2rad(values[0]))
+    elif name == 'skewY' and len(values) == 1:
+        matrix[1, 0] = np.tan(np.deg2rad(values[0]))
+    return matrix
+
+
+def parse_transform(text):
+    """3x3 affine matrix of an SVG transform attribute, e.g. 'translate(10 5) rotate(30)'."""
+    matrix = np.identity(3)
+    for name, arguments in _TRANSFORM.findall(text):
+        matrix = matrix @ transform_matrix(name, [float(value) for value in _NUMBER.findall(arguments)])
+    return matrix
+
+
+def view_box_matrix(svg_element, width, height):
+    """Matrix from viewBox units to the canvas (uniform scale, centred, like preserveAspectRatio's default)."""
+    parts = _NUMBER.findall(svg_element.get('viewBox', ''))
+    if len(parts) != 4 or not width or not height:
+        return np.identity(3)
+    min_x, min_y, view_width, view_height = (float(part) for part in parts)
+    if view_width <= 0 or view_height <= 0:
+        return np.identity(3)
+    scale = min(width / view_width, height / view_height)
+    matrix = np.diag([scale, scale, 1.0])
+    matrix[:2, 2] = ((width - view_width * scale) / 2 - min_x * scale,
+                     (height - view_height * scale) / 2 - min_y * scale)
+    return matrix
+
+
+def apply_matrix(points, matrix):
+    """Transform an (n, 2) array of points by a 3x3 affine matrix."""
+    return points @ matrix[:2, :2].T + matrix[:2, 2]
+
+
+def parse_css(css_text):
+    """Stroke rules of a stylesheet as (specificity, selector, stroke); other properties are ignored."""
+    rules = []
+    for selectors, declarations in _CSS_RULE.findall(_CSS_COMMENT.sub('', css_text)):
+        match = _STROKE_STYLE.search(declarations.strip())
+        if not match:
+            continue
+        for selector in selectors.split(','):
+            parsed = _CSS_SELECTOR.fullmatch(selector.strip())
+            if not parsed or not selector.strip():
+                continue  # Combinators, attribute selectors and pseudo-classes are not supported
+            tag, parts = parsed.groups()
+            ids = [part[1:] for part in re.findall(r'#[\w-]+', parts)]
+            classes = [part[1:] for part in re.findall(r'\.[\w-]+', parts)]
+            specificity = (len(ids), len(classes), int(bool(tag) and tag != '*'))
+            rules.append((specificity, (tag if tag != '*' else None, ids, classes), match.group(1).strip()))
+    return rules
+
+
+def css_stroke(element, name, rules):
+    """Stroke from the most specific matching CSS rule (the later one on a tie), or None."""
+    element_classes = element.get('class', '').split()
+    element_id = element.get('id')
+    best = None
+    for specificity, (tag, ids, classes), stroke in rules:
+        if tag and tag != name:
+            continue
+        if any(selector_id != element_id for selector_id in ids):
+            continue
+        if any(selector_class not in element_classes for selector_class in classes):
+            continue
+        if best is None or specificity >= best[0]:
+            best = (specificity, stroke)
+    return best[1] if best else None
+
+
+def element_stroke(element, name='', rules=()):
+    """Stroke set on the element itself, or None if it inherits one.
+
+    The style attribute wins over CSS rules, which win over the stroke
+    presentation attribute.
+    """
+    match = _STROKE_STYLE.search(element.get('style', ''))
+    if match:
+        stroke = match.group(1).strip()
+    else:
+        stroke = css_stroke(element, name, rules) if rules else None
+        if stroke is None:
+            stroke = element.get('stroke')
+    return None if stroke in (None, 'inherit') else stroke
+
+
+class SVGReader:
+    """Reads the drawn <path> elements of an SVG file in one streaming pass.
+
+    Iterating yields (d, stroke, matrix) per path: stroke is resolved from the
+    style attribute, <style> rules and the stroke attribute and inherited
+    through the enclosing groups ('none' if nothing sets one); matrix is the
+    3x3 transform from path coordinates to the canvas, composed once per group
+    from the viewBox and every transform attribute above the path.
+    canvas_size is set from the root element before the first path. A <style>
+    element after the first path costs one more parsing pass (rules also apply
+    to the paths before it). Elements are dropped from the tree as soon as
+    they end, so memory use does not grow with the size of the file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.canvas_size = None
+        self.css_rules = []
+
+    def _has_late_style(self):
+        """True if a <style> element starts after the first <path> (a raw byte scan, no parsing)."""
+        seen_path = False
+        tail = b''
+        with open_svg(self.filename) as f:
+            for block in iter(lambda: f.read(SCAN_BLOCK_SIZE), b''):
+                data = tail + block
+                start = 0
+                if not seen_path:
+                    match = _PATH_TAG.search(data)
+                    if not match:
+                        tail = data[-64:]
+                        continue
+                    seen_path, start = True, match.end()
+                if _STYLE_TAG.search(data, start):
+                    return True
+                tail = data[-64:]
+        return False
+
+    def _read_css_rules(self):
+        """Stroke rules of every <style> element, wherever it is in the file."""
+        rules = []
+        parents = []
+        with open_svg(self.filename) as f:
+            for event, element in ET.iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    parents.append(element)
+                    continue
+                parents.pop()
+                if _local_name(element.tag) == 'style':
+                    rules.extend(parse_css(element.text or ''))
+                element.clear()
+                if parents:
+                    parents[-1].remove(element)
+        return rules
+
+    def __iter__(self):
+        # Rules apply to the whole document: a stylesheet after the first path needs a first pass
+        # for its rules, otherwise they are collected while reading, before any path they style
+        late_style = self._has_late_style()
+        self.css_rules = self._read_css_rules() if late_style else []
+        # One entry per open element: (element, stroke, matrix, hidden)
+        stack = []
+        with open_svg(self.filename) as f:
+            for event, element in ET.iterparse(f, events=('start', 'end')):
+                name = _local_name(element.tag)
+                if event == 'start':
+                    if not stack:
+                        self.canvas_size = canvas_size(element) if name == 'svg' else (None, None)
+                        parent_stroke, parent_hidden = 'none', False
+                        parent_matrix = view_box_matrix(element, *self.canvas_size)
+                    else:
+                        _, parent_stroke, parent_matrix, parent_hidden = stack[-1]
+                    transform = element.get('transform')
+                    stack.append((
+                        element,
+                        element_stroke(element, name, self.css_rules) or parent_stroke,
+                        parent_matrix @ parse_transform(transform) if transform else parent_matrix,
+                        parent_hidden or name in HIDDEN_ELEMENTS,
+                    ))
+                    continue
+
+                _, stroke, matrix, hidden = stack.pop()
+                if name == 'style' and not late_style:
+                    self.css_rules.extend(parse_css(element.text or ''))
+                elif name == 'path' and not hidden:
+                    d = element.get('d')
+                    if d:
+                        yield d, stroke, matrix
+                element.clear()
+                if stack:
+                    stack[-1][0].remove(element)
@@ -0,0 +1,79 @@
+# Compact SVG writer: design polylines straight to <path> elements grouped per pen color
+import gzip
+import os
+import tempfile
+
+from matplotlib.colors import to_hex
+
+from geometry import DESIGN_X_LIMITS, DESIGN_Y_LIMITS
+
+SVG_PRECISION = 2  # Decimals kept per coordinate (design units)
+SVG_STROKE_WIDTH = 0.5
+
+
+def _format_number(value, precision):
+    text = f"{value:.{precision}f}"
+    if precision > 0:
+        text = text.rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+def path_data(points, precision=SVG_PRECISION):
+    """'M x,y L x,y x,y ...' for an (n, 2) array, numbers trimmed to precision decimals."""
+    pairs = [f"{_format_number(x, precision)},{_format_number(y, precision)}" for x, y in points.tolist()]
+    return f"M{pairs[0]}L{' '.join(pairs[1:])}"
+
+
+def design_to_svg(polylines, precision=SVG_PRECISION, x_limits=DESIGN_X_LIMITS, y_limits=DESIGN_Y_LIMITS):
+    """SVG text for (color, points) polylines in design coordinates.
+
+    The canvas is the design frame with Y pointing down, so the file converts
+    back to HPGL at the same scale as the design. Shapes are grouped per color
+    (one <g> per pen, stroke set once on the group) and keep their drawing order
+    within the group; nothing else (clip paths, styles, metadata) is written.
+    """
+    width = x_limits[1] - x_limits[0]
+    height = y_limits[1] - y_limits[0]
+
+    groups = {}
+    for color, points in polylines:
+        if len(points) < 2:
+            continue
+        svg_points = points - (x_limits[0], 0)
+        svg_points[:, 1] = y_limits[1] - points[:, 1]
+        groups.setdefault(to_hex(color), []).append(f'<path d="{path_data(svg_points, precision)}"/>')
+
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}" fill="none" stroke-width="{SVG_STROKE_WIDTH}">']
+    for stroke, paths in groups.items():
+        lines.append(f'<g stroke="{stroke}">')
+        lines.extend(paths)
+        lines.append('</g>')
+    lines.append('</svg>\n')
+    return '\n'.join(lines)
+
+
+def write_svg(svg_filename, svg_text):
+    """Write the SVG atomically: readers see the old file or the new one, never half of it.
+
+    A .svgz filename is written gzip-compressed.
+    """
+    # A unique temporary file next to the target, so concurrent writers never share one
+    temp_file = tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(svg_filename)),
+                                            suffix='.tmp', delete=False)
+    try:
+        with temp_file:
+            if svg_filename.lower().endswith('.svgz'):
+                with gzip.open(temp_file, 'wt', encoding='utf-8') as f:
+                    f.write(svg_text)
+            else:
+                temp_file.write(svg_text.encode('utf-8'))
+        os.replace(temp_file.name, svg_filename)
+    except BaseException:
+        os.unlink(temp_file.name)
+        raise
+
+
+def write_design_svg(svg_filename, polylines, precision=SVG_PRECISION):
+    """Write polylines with design_to_svg; a .svgz filename is gzip-compressed."""
+    write_svg(svg_filename, design_to_svg(polylines, precision))
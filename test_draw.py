@@ -1,6 +1,6 @@
-import time
 import serial
 from tkinter import messagebox
+from plotter_stream import HPGLStreamer, split_commands, HANDSHAKE_RTSCTS
 
 # Define the serial connection (global variable)
 serial_connection = None
@@ -33,18 +33,9 @@ def send_hpgl_command(hpgl_code):
         return
 
     try:
-        # Split the HPGL code into individual lines or commands
-        commands = hpgl_code.splitlines()
-
-        for command in commands:
-            full_command = f"{command};\n".encode()  # Format command with terminator
-            serial_connection.write(full_command)  # Send the command
-            serial_connection.flush()  # Ensure the command is sent immediately
-
-            print(f"Sent: {command}")  # Debugging print
-
-            # Small delay between commands to allow processing
-            time.sleep(0.2)  # Adjust as necessary based on plotter's response
+        # RTS/CTS paces the writes, so no per-command delay is needed
+        streamer = HPGLStreamer(serial_connection, HANDSHAKE_RTSCTS)
+        streamer.send(split_commands(hpgl_code), on_progress=lambda sent, total, _: print(f"Sent {sent}/{total} commands"))
 
     except Exception as e:
         messagebox.showerror("Error", f"Failed to send command: {e}")
@@ -0,0 +1,21 @@
+# Round-trip checks for sending .hpgl files as written
+from hpgl_parser import iter_hpgl_file_commands, split_raw_commands
+
+HPGL_FILE = (b"IN;\x1b.I81;;17:\x1b.N;19:SP1;\nPU100,100;PD200,200,300,100;\n"
+             b"LBHello; world\x03;DT*;LBsemi;colon:*\x1b.B PA 10 , 20;;\r\nPU0,0")
+
+
+def test_file_commands_round_trip(tmp_path):
+    path = tmp_path / "job.hpgl"
+    path.write_bytes(HPGL_FILE)
+    for chunk_size in (1, 2, 3, 7, 64, 1 << 20):
+        commands = list(iter_hpgl_file_commands(str(path), chunk_size))
+        assert b''.join(commands) == HPGL_FILE
+
+
+def test_split_keeps_labels_and_escapes_whole():
+    commands = [command.lstrip() for command in split_raw_commands([HPGL_FILE])]
+    assert b"\x1b.I81;;17:" in commands
+    assert b"LBHello; world\x03" in commands
+    assert b"LBsemi;colon:*" in commands  # Terminator changed by DT
+    assert b"\x1b.B" in commands
@@ -0,0 +1,57 @@
+# Resume and queue checks against pty fake plotters
+import os
+
+import serial
+
+from fake_plotter import FakePlotter
+from plot_job import PlotJob
+from plot_queue import PlotQueue, PlotterDevice
+
+BAUD_RATE = 38400
+HPGL_CODE = "IN;\nSP1;\n" + "".join(f"PU{i * 10},0;\nPD{i * 10},300;\n" for i in range(100)) + "PU0,0;\nSP0;\n"
+
+
+def test_resume_sends_the_remaining_commands(tmp_path):
+    job = PlotJob(HPGL_CODE, str(tmp_path / "checkpoint.json"))
+    job.save_checkpoint(52)
+    start = job.load_checkpoint()
+    assert start == 52
+
+    fake = FakePlotter(buffer_size=512, drain_rate=2000.0, baud_rate=BAUD_RATE)
+    connection = serial.Serial(fake.port, BAUD_RATE, timeout=0.2)
+    try:
+        worker = job.create_worker(connection, start=start)
+        worker.start()
+        worker.join(10)
+        assert worker.state == 'finished'
+        assert fake.wait_until_idle()
+    finally:
+        connection.close()
+        fake.close()
+
+    remaining = b''.join(list(job.iter_commands(start)))
+    preamble = b''.join(job.resume_preamble(start))
+    assert preamble == b"IN;SP1;PA;PU240,300;"  # Pen down before the checkpoint, no bare PD
+    assert bytes(fake.received) == preamble + remaining
+    assert not os.path.exists(job.checkpoint_path)
+
+
+def test_queue_drains_around_a_bad_port(tmp_path):
+    fakes = [FakePlotter(buffer_size=512, drain_rate=4000.0, baud_rate=BAUD_RATE) for _ in range(2)]
+    devices = [PlotterDevice(fake.port, BAUD_RATE) for fake in fakes]
+    bad_device = PlotterDevice(str(tmp_path / "no-such-port"), BAUD_RATE)
+    plot_queue = PlotQueue([bad_device, *devices], checkpoint_dir=str(tmp_path / "checkpoints"))
+    jobs = [plot_queue.submit(HPGL_CODE, name=f"job {i}") for i in range(4)]
+    plot_queue.start()
+    try:
+        assert plot_queue.wait_until_empty(timeout=30)
+    finally:
+        plot_queue.stop()
+        plot_queue.join()
+        for fake in fakes:
+            fake.close()
+
+    assert [job.state for job in jobs] == ['finished'] * 4
+    assert bad_device.state == 'error'
+    assert sum(device.jobs_done for device in devices) == 4
+    assert plot_queue.stats()['queue_depth'] == 0
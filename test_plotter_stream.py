@@ -0,0 +1,59 @@
+# Streaming checks against the pty fake plotter: handshakes keep the buffer from overflowing, cancel aborts
+import pytest
+import serial
+
+from fake_plotter import FakePlotter
+from plot_worker import PlotWorker
+from plotter_stream import HANDSHAKE_BUFFER, HANDSHAKE_XONXOFF, HPGLStreamer
+
+BAUD_RATE = 38400
+
+
+def job_commands(count=200):
+    return [f"PU{i * 10},{i * 5};PD{i * 10 + 400},{i * 5};".encode() for i in range(count)]
+
+
+@pytest.fixture
+def plotter():
+    fake = FakePlotter(buffer_size=512, drain_rate=2000.0, baud_rate=BAUD_RATE)
+    connection = serial.Serial(fake.port, BAUD_RATE, timeout=0.2)
+    yield fake, connection
+    connection.close()
+    fake.close()
+
+
+def test_buffer_handshake_is_byte_exact(plotter):
+    fake, connection = plotter
+    commands = job_commands()
+    streamer = HPGLStreamer(connection, HANDSHAKE_BUFFER)
+    assert streamer.send(commands) == len(commands)
+    assert fake.wait_until_idle()
+    assert bytes(fake.received) == b''.join(commands)
+    assert fake.overflows == 0
+    assert streamer.queries > 1
+
+
+def test_xonxoff_pauses_and_resumes(plotter):
+    fake, connection = plotter
+    commands = job_commands()
+    streamer = HPGLStreamer(connection, HANDSHAKE_XONXOFF)
+    streamer.configure()
+    streamer.send(commands)
+    assert fake.wait_until_idle()
+    assert bytes(fake.received) == b''.join(commands)
+    assert fake.overflows == 0
+    assert fake.xoffs > 0 and fake.xons > 0
+
+
+def test_cancel_sends_abort(plotter):
+    fake, connection = plotter
+    worker = PlotWorker(connection, job_commands(2000))
+    worker.start()
+    while worker.commands_sent == 0 and not worker.done:
+        worker.join(0.05)
+    worker.cancel()
+    worker.join(5)
+    assert worker.state == 'cancelled'
+    assert fake.wait_until_idle()
+    assert fake.aborts == 1
+    assert fake.received.endswith(b'PU;SP0;\n')
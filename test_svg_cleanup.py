@@ -0,0 +1,32 @@
+# clipPath cleanup checks: rectangles go, clipPaths left empty go, everything else stays
+import gzip
+
+import pytest
+
+from svg_cleanup import clean_svg, clean_svg_file
+
+SVG_TEXT = ('<svg xmlns="http://www.w3.org/2000/svg"><defs>'
+            '<clipPath id="a"><rect x="0" y="0" width="10" height="10"/></clipPath>'
+            '<clipPath id="b"><rect width="5" height="5"></rect><path d="M0 0L5 5"/></clipPath>'
+            '</defs><path d="M0 0L1 1" clip-path="url(#b)"/></svg>')
+CLEANED = ('<svg xmlns="http://www.w3.org/2000/svg"><defs>'
+           '<clipPath id="b"><path d="M0 0L5 5"/></clipPath>'
+           '</defs><path d="M0 0L1 1" clip-path="url(#b)"/></svg>')
+
+
+def test_clean_svg():
+    assert clean_svg(SVG_TEXT) == CLEANED
+    assert clean_svg(CLEANED) == CLEANED
+
+
+@pytest.mark.parametrize('name', ['drawing.svg', 'drawing.svgz'])
+def test_clean_svg_file(tmp_path, name):
+    svg_file = tmp_path / name
+    opener = gzip.open if name.endswith('.svgz') else open
+    with opener(svg_file, 'wt', encoding='utf-8') as f:
+        f.write(SVG_TEXT)
+    assert clean_svg_file(str(svg_file))
+    with opener(svg_file, 'rt', encoding='utf-8') as f:
+        assert f.read() == CLEANED
+    assert not clean_svg_file(str(svg_file))
+    assert [path.name for path in tmp_path.iterdir()] == [name]
@@ -0,0 +1,30 @@
+# SVG conversion checks: small files stay in-process, the pool keeps file order
+import numpy as np
+
+import svg_convert
+from svg_convert import svg_to_plot_paths
+
+PATH = '<g transform="translate({x},{y})" stroke="{color}"><path d="M0 0 C 10 50 90 50 100 0 Q 50 -40 0 0"/></g>'
+
+
+def write_svg_file(tmp_path, count):
+    svg_file = tmp_path / 'paths.svg'
+    paths = ''.join(PATH.format(x=i % 90 * 10, y=i // 90 * 10, color=['red', 'green'][i % 2]) for i in range(count))
+    svg_file.write_text(f'<svg xmlns="http://www.w3.org/2000/svg" width="1000" height="1000">{paths}</svg>')
+    return str(svg_file)
+
+
+def test_small_files_convert_in_process(tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("pool started for a small file")
+
+    monkeypatch.setattr(svg_convert, 'ProcessPoolExecutor', no_pool)
+    assert len(svg_to_plot_paths(write_svg_file(tmp_path, 600), 0.5, workers=4)) == 600
+
+
+def test_pool_keeps_file_order(tmp_path):
+    svg_file = write_svg_file(tmp_path, 300)
+    serial = svg_to_plot_paths(svg_file, 0.5, workers=1)
+    pooled = svg_to_plot_paths(svg_file, 0.5, workers=2, chunk_size=64, pool_min_paths=100)
+    assert len(pooled) == len(serial)
+    assert all(a[0] == b[0] and np.array_equal(a[1], b[1]) for a, b in zip(serial, pooled))
@@ -0,0 +1,14 @@
+# Stylesheet checks: <style> rules apply to every path, wherever the stylesheet is
+import pytest
+
+from svg_reader import SVGReader
+
+STYLE = '<style>.a { stroke: #ff0000 }</style>'
+PATHS = '<path class="a" d="M0 0L1 1"/><path d="M0 0L2 2" stroke="blue"/>'
+
+
+@pytest.mark.parametrize('body', [STYLE + PATHS, PATHS + STYLE, '<g>' + PATHS + '</g><defs>' + STYLE + '</defs>'])
+def test_style_rules_apply_to_all_paths(tmp_path, body):
+    svg_file = tmp_path / 'styled.svg'
+    svg_file.write_text(f'<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10">{body}</svg>')
+    assert [stroke for _, stroke, _ in SVGReader(str(svg_file))] == ['#ff0000', 'blue']
@@ -1,49 +1,81 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.collections import LineCollection
 import matplotlib.pyplot as plt
-from xml.dom import minidom
 import re
-import math
 import serial.tools.list_ports  # For serial port discovery
 import serial  # For serial communication
+import os
 import time
 from tkinter import filedialog
 
 from svg.path import parse_path
-from xml.dom import minidom
+from geometry import generate_design_polylines
+from hpgl import polylines_to_hpgl, plot_paths_to_hpgl, write_hpgl, pen_color_mapping
+from path_optimizer import optimize_paths, travel_distance, merge_contiguous_paths
+from flatten import flatten_path, FLATTEN_TOLERANCE
+from simplify import simplify_paths, SIMPLIFY_TOLERANCE
+from plotter_stream import HANDSHAKES, HANDSHAKE_BUFFER
+from plot_job import PlotJob
+from plot_queue import PlotQueue, PlotterDevice
+from plot_time import PlotTimeModel, log_job_time, load_job_times
+from hpgl_parser import parse_hpgl, parse_hpgl_file
+from hpgl_packer import pack_hpgl
+from preview_lod import ToolPathLOD
+from plot_simulation import PlotTimeline, PlotSimulation
+from redraw_scheduler import RedrawScheduler
+from svg_reader import SVGReader, apply_matrix
+from svg_convert import svg_to_plot_paths, CONVERT_WORKERS
+from svg_cleanup import clean_svg_file
 #from print_module import HPGLPrinter
 
-# Plotter speeds in mm/s
-SLEWING_SPEED = 400  # Pen-up speed
-DRAWING_SPEED = 100  # Pen-down speed
-
 # Global variables for tool path window
 canvas_hpgl = None
 fig_hpgl = None
+ax_hpgl = None
+hpgl_collections = {}  # Preview artists: 'pen_up' (dashed) plus one collection per pen
+hpgl_lod = None  # Level-of-detail geometry of the previewed job
+SCROLL_ZOOM = 1.25  # Zoom factor per mouse-wheel step in the preview
+SIMULATION_FRAME_MS = 33  # Frame interval of the plot simulation
+SIMULATION_SPEEDS = ["1x", "10x", "60x", "600x"]  # Playback speed choices
 hpgl_code = ""
 current_svg = "vector_output.svg"  # Set to the uploaded SVG file path
 serial_connection = None  # To store the serial connection object
+plot_worker = None  # Background sender for the current plot job
+plot_queue = None  # Job queue over a pool of plotters
 
-# After the root window is created, create `BooleanVar` for border toggling
 root = tk.Tk()
+hpgl_view_scheduler = RedrawScheduler(root, lambda _: refresh_hpgl_view())  # Coalesces pan/zoom updates
 root.withdraw()  # Hide the window
-include_border = tk.BooleanVar(value=True)  # Create after the root window is initialized
+
+# Tool settings, created by init_tool_settings on the application's interpreter: a Tk variable
+# belongs to one interpreter, and widgets in the main window's Toplevels cannot use the hidden root's
+include_border = None
+optimize_travel = None
+flatten_tolerance = None
+simplify_tolerance = None
+plotter_handshake = None
+pack_commands = None
+conversion_workers = None
+
+def init_tool_settings(master):
+    """Create the tool setting variables on master's interpreter; later calls keep the existing ones."""
+    global include_border, optimize_travel, flatten_tolerance, simplify_tolerance, plotter_handshake, pack_commands, conversion_workers
+    if include_border is not None:
+        return
+    include_border = tk.BooleanVar(master, value=True)
+    optimize_travel = tk.BooleanVar(master, value=True)  # Reorder paths to minimise pen-up travel
+    flatten_tolerance = tk.DoubleVar(master, value=FLATTEN_TOLERANCE)  # Curve flattening tolerance in plotter units
+    simplify_tolerance = tk.DoubleVar(master, value=SIMPLIFY_TOLERANCE)  # Polyline simplification tolerance, 0 disables
+    plotter_handshake = tk.StringVar(master, value=HANDSHAKE_BUFFER)  # How the sender paces the plotter buffer
+    pack_commands = tk.BooleanVar(master, value=True)  # Coalesce coordinates / use PR to cut serial bytes
+    conversion_workers = tk.IntVar(master, value=CONVERT_WORKERS)  # Processes used to convert SVG paths
 
 # Serial port tools - list available ports and initialize the baud rate
 available_ports = [port.device for port in serial.tools.list_ports.comports()]
 baud_rates = [75, 110, 150, 200, 300, 600, 1200, 2400, 2800, 9600, 19200, 38400, 57600, 115200]  # Available baud rates
 
-# Add this near the top of your script
-pen_color_mapping = {
-    1: 'green',
-    2: 'red',
-    3: 'blue',
-    4: 'gray',  # Default pen color
-    5: 'yellow',
-    6: 'pink'
-}
-
 # Serial connection helper functions
 def connect_to_plotter(selected_port, selected_baud_rate):
     global serial_connection
@@ -68,25 +100,95 @@ def send_hpgl_command(command):
     else:
         messagebox.showerror("Error", "Not connected to the plotter.")
 
-def send_hpgl_code_from_vect   ():
-    """Send HPGL code to the plotter."""
-    global hpgl_code
+def send_hpgl_code_from_vect   (parent=None):
+    """Send HPGL code to the plotter on a background thread."""
+    start_plot_job(PlotJob(hpgl_code), parent, lambda: parse_hpgl(hpgl_code))
+
+
+# Stream a .hpgl file straight from disk (large jobs are never loaded whole)
+def send_hpgl_file(parent=None):
+    filename = filedialog.askopenfilename(title="Select HPGL File", filetypes=[("HPGL files", "*.hpgl *.plt"), ("All files", "*.*")])
+    if filename:
+        start_plot_job(PlotJob(filename=filename), parent, lambda: parse_hpgl_file(filename))
+
+
+def start_plot_job(job, parent=None, parse_job=None):
+    global plot_worker
     if not serial_connection:
         messagebox.showerror("Error", "No connection to the plotter.")
         return
+    if plot_worker is not None and not plot_worker.done:
+        messagebox.showerror("Error", "A plot job is already running.")
+        return
 
-    try:
-        lines = hpgl_code.splitlines()
-        for line in lines:
-            serial_connection.write(f"{line}\n".encode())
-            serial_connection.flush()  # Ensure all data is sent
-            time.sleep(0.4)  # Add a small delay to allow the plotter to process each command
-            print(line)
+    # Offer to carry on from the checkpoint left by an interrupted run of this job
+    start = job.load_checkpoint()
+    if start and not messagebox.askyesno(
+            "Resume Plot", f"This job stopped after command {start} of {job.total}. Resume from there?"):
+        start = 0
+
+    # Stream as fast as the plotter's buffer/handshake allows, off the Tk thread
+    plot_worker = job.create_worker(serial_connection, plotter_handshake.get(), start)
+    plot_worker.start()
+
+    # Log how long complete runs take so the time model can be calibrated. Only the
+    # buffer handshake finishes once the plotter's buffer is empty; with xonxoff or
+    # rtscts up to a buffer of drawing is still to come when the last byte is written
+    on_finished = None
+    if start == 0 and parse_job is not None and plot_worker.streamer.handshake == HANDSHAKE_BUFFER:
+        features = PlotTimeModel.load().program_features(parse_job())
+        on_finished = lambda progress: log_job_time(features, progress['elapsed'])
+    open_plot_progress_window(parent or root, plot_worker, on_finished)
+
+
+# Format seconds as m:ss for the progress window
+def format_duration(seconds):
+    if seconds is None:
+        return "--:--"
+    return f"{int(seconds // 60)}:{int(seconds % 60):02d}"
 
 
+# Progress window for a running plot job, refreshed with root.after polling
+def open_plot_progress_window(parent, worker, on_finished=None):
+    progress_window = tk.Toplevel(parent)
+    progress_window.title("Plotting")
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to send HPGL code: {e}")
+    frame = ttk.Frame(progress_window, padding="10")
+    frame.grid(row=0, column=0, sticky="nsew")
+
+    status_var = tk.StringVar(progress_window, value="Starting...")
+    ttk.Label(frame, textvariable=status_var, width=60).grid(row=0, column=0, columnspan=3, padx=10, pady=5)
+
+    progress_bar = ttk.Progressbar(frame, maximum=max(worker.total, 1), length=400)
+    progress_bar.grid(row=1, column=0, columnspan=3, padx=10, pady=5)
+
+    pause_button = ttk.Button(frame, text="Pause", command=lambda: worker.resume() if worker.state == 'paused' else worker.pause())
+    pause_button.grid(row=2, column=0, padx=10, pady=5)
+    cancel_button = ttk.Button(frame, text="Cancel", command=worker.cancel)
+    cancel_button.grid(row=2, column=1, padx=10, pady=5)
+
+    def poll():
+        progress = worker.progress()
+        progress_bar['value'] = progress['commands_acked']
+        status_var.set(
+            f"{progress['state'].capitalize()}: {progress['commands_acked']}/{progress['total']} commands acked, "
+            f"{progress['commands_sent']} sent ({progress['bytes_sent']} bytes), "
+            f"elapsed {format_duration(progress['elapsed'])}, ETA {format_duration(progress['eta'])}"
+        )
+        pause_button.config(text="Resume" if progress['state'] == 'paused' else "Pause")
+
+        if worker.done:
+            pause_button.config(state=tk.DISABLED)
+            cancel_button.config(state=tk.DISABLED)
+            if progress['state'] == 'finished' and on_finished is not None:
+                on_finished(progress)
+            if progress['state'] == 'failed':
+                messagebox.showerror("Error", f"Failed to send HPGL code: {progress['error']}\n"
+                                              "Progress was saved; print again to resume.")
+            return
+        progress_window.after(200, poll)
+
+    poll()
 
 # Helper function to parse 'd' attribute from path elements (basic M and L commands)
 def parse_svg_path(path_data):
@@ -113,317 +215,290 @@ def parse_svg_path(path_data):
 
     return points
 
-# Function to get the dimensions of the SVG canvas
-def convert_to_pixels(value_str):
-    try:
-        if not value_str or value_str.strip() == "":
-            return None
-        value_str = value_str.strip()
-        if value_str.endswith('px'):
-            return float(value_str[:-2])
-        elif value_str.endswith('pt'):
-            return float(value_str[:-2]) * 1.333
-        elif value_str.endswith('mm'):
-            return float(value_str[:-2]) * 3.7795275591
-        elif value_str.endswith('cm'):
-            return float(value_str[:-2]) * 37.795275591
-        elif value_str.endswith('in'):
-            return float(value_str[:-2]) * 96
-        elif value_str.endswith('%'):
-            print(f"Warning: Percentage unit '{value_str}' not supported. Returning None.")
-            return None
-        else:
-            return float(value_str)
-    except ValueError:
-        print(f"Could not parse dimension '{value_str}'. Returning None.")
-        return None
-
-
-
-def get_svg_canvas_size(svg_filename):
-    svg_doc = minidom.parse(svg_filename)
-    svg_element = svg_doc.getElementsByTagName('svg')[0]
-
-    width = svg_element.getAttribute('width')
-    height = svg_element.getAttribute('height')
-    print(f"SVG raw width: '{width}', height: '{height}'")
-
-    width_px = convert_to_pixels(width)
-    height_px = convert_to_pixels(height)
-
-    # Fallback to viewBox if dimensions fail
-    if not width_px or not height_px or width_px <= 0 or height_px <= 0:
-        view_box = svg_element.getAttribute('viewBox')
-        if view_box:
-            print("Falling back to viewBox dimensions.")
-            parts = view_box.strip().split()
-            if len(parts) == 4:
-                width_px = float(parts[2])
-                height_px = float(parts[3])
-
-    return width_px, height_px
-
-
 # Function to convert from pixels (px) to points (pt)
 def convert_px_to_pt(px_value):
     return px_value / 1.333
 
 
 from svg.path import parse_path
-from xml.dom import minidom
 
-def parse_svg_path_accurate(svg_filename):
-    doc = minidom.parse(svg_filename)
-    path_elements = doc.getElementsByTagName('path')
+def parse_svg_path_accurate(svg_filename, tolerance=0.05):
     all_points = []
 
-    for path_el in path_elements:
-        d = path_el.getAttribute('d')
-        if not d:
-            continue
+    for d, _, matrix in SVGReader(svg_filename):
         path = parse_path(d)
 
-        # Sample points along the path
+        # Flatten the path: one point per line, tolerance-driven sampling for curves
         sampled_points = []
-        for segment in path:
-            for t in [i / 10.0 for i in range(11)]:  # 10 segments per curve/line
-                point = segment.point(t)
-                sampled_points.append((point.real, point.imag))
+        for polyline in flatten_path(path, tolerance):
+            sampled_points.extend(map(tuple, apply_matrix(polyline, matrix).tolist()))
 
         all_points.append(sampled_points)
 
-    doc.unlink()
     return all_points
 
 
 # Updated function to convert SVG to HPGL, excluding the canvas border and mapping pen colors
-from xml.dom import minidom
 from svg.path import parse_path
 import re
 import tkinter as tk
 
-def convert_svg_to_hpgl():
+def convert_svg_to_hpgl(tolerance=None):
     global hpgl_code
 
-    svg_doc = minidom.parse(current_svg)
-    path_elements = svg_doc.getElementsByTagName('path')
-
-    # Initialize HPGL
-    hpgl_code_lines = ["IN;", "PA;"]
-
-    # Get SVG canvas size
-    canvas_width_px, canvas_height_px = get_svg_canvas_size(current_svg)
+    if tolerance is None:
+        tolerance = flatten_tolerance.get()  # Max chord error in plotter units
 
-    # HPGL space
-    HPGL_MAX_UNITS_X = 13000
-    HPGL_MAX_UNITS_Y = 16800
+    # Parse and flatten the paths on a process pool, merged back in file order
+    plot_paths = svg_to_plot_paths(current_svg, tolerance, workers=conversion_workers.get())
 
-    # Scale to fit canvas
-    x_scale = HPGL_MAX_UNITS_X / canvas_width_px
-    y_scale = HPGL_MAX_UNITS_Y / canvas_height_px
-    uniform_scale = min(x_scale, y_scale)
+    # Drop polylines that collapsed to a single plotter point
+    plot_paths = [(pen, points) for pen, points in plot_paths if len(points) >= 2]
 
-    print(f"Uniform scale factor: {uniform_scale}")
+    # Drop collinear and sub-tolerance points before they reach the plotter buffer
+    if simplify_tolerance.get() > 0:
+        plot_paths, removed = simplify_paths(plot_paths, simplify_tolerance.get())
+        print(f"Simplification removed {removed} points")
 
-    seen_paths = set()
+    # Reorder paths by pen and nearest neighbour to cut pen-up travel
+    if optimize_travel.get():
+        travel_before = travel_distance(plot_paths)
+        plot_paths = optimize_paths(plot_paths)
+        print(f"Pen-up travel: {travel_before:.0f} -> {travel_distance(plot_paths):.0f} plotter units")
 
-    for path in path_elements:
-        path_data = path.getAttribute('d')
-        path_color = path.getAttribute('style')
-
-        if not path_data or path_data in seen_paths:
-            continue  # skip duplicates or empty paths
-        seen_paths.add(path_data)
-
-        # Extract pen number from stroke color
-        pen_number = 4
-        if path_color:
-            color_match = re.search(r'stroke:([^;]+);', path_color)
-            if color_match:
-                color = color_match.group(1).strip().upper()
-                color_to_pen = {
-                    '#008000': 1,  # Green
-                    '#FF0000': 2,  # Red
-                    '#0000FF': 3,  # Blue
-                    '#808080': 4,  # Gray/Black
-                    '#FFFF00': 5,  # Yellow
-                    '#FFC0CB': 6,  # Pink
-                }
-                pen_number = color_to_pen.get(color, 4)
-
-        hpgl_code_lines.append(f"SP{pen_number};")
+    # Finalize HPGL output
+    hpgl_code = pack_for_serial(plot_paths_to_hpgl(merge_contiguous_paths(plot_paths)))
+    hpgl_text_box.delete(1.0, tk.END)
+    hpgl_text_box.insert(tk.END, hpgl_code)
 
-        # Parse and convert path
-        try:
-            path_obj = parse_path(path_data)
-        except Exception as e:
-            print(f"Error parsing path: {e}")
-            continue
+    print("Generated HPGL Code:\n", hpgl_code)
 
-        for segment in path_obj:
-            if segment.length(error=1e-2) == 0:
-                continue  # skip zero-length segments
+    write_hpgl(hpgl_code)
 
-            # Sample points along the segment
-            points = [(segment.point(t).real, segment.point(t).imag) for t in [i / 10.0 for i in range(11)]]
-            if not points:
-                continue
 
-            # Start new path
-            start_x, start_y = points[0]
-            hpgl_code_lines.append(f"PU{int(start_x * uniform_scale)},{int(start_y * uniform_scale)};")
-            hpgl_code_lines.append("PD;")
+# Pack the generated HPGL into as few serial bytes as possible (if enabled)
+def pack_for_serial(code):
+    if not pack_commands.get():
+        return code
+    packed, report = pack_hpgl(code)
+    print(f"Packed HPGL: {report['bytes_before']} -> {report['bytes_after']} bytes")
+    return packed
 
-            last_pt = (int(start_x * uniform_scale), int(start_y * uniform_scale))
-            for x, y in points[1:]:
-                scaled_x = int(x * uniform_scale)
-                scaled_y = int(y * uniform_scale)
-                if (scaled_x, scaled_y) != last_pt:
-                    hpgl_code_lines.append(f"PA{scaled_x},{scaled_y};")
-                    last_pt = (scaled_x, scaled_y)
 
-            hpgl_code_lines.append("PU;")
+# Convert the design layers straight to HPGL, skipping the SVG export and cleanup passes
+def convert_design_to_hpgl(layer_properties):
+    global hpgl_code
 
-    # Finalize HPGL output
-    hpgl_code = '\n'.join(hpgl_code_lines)
+    hpgl_code = polylines_to_hpgl(generate_design_polylines(layer_properties), optimize=optimize_travel.get(),
+                                  simplify_tolerance=simplify_tolerance.get())
+    hpgl_code = pack_for_serial(hpgl_code)
     hpgl_text_box.delete(1.0, tk.END)
     hpgl_text_box.insert(tk.END, hpgl_code)
 
-    print("Generated HPGL Code:\n", hpgl_code)
-
-    with open("output.hpgl", "w") as hpgl_file:
-        hpgl_file.write(hpgl_code)
+    write_hpgl(hpgl_code)
 
 
-# Function to calculate distance between two points
-def calculate_distance(x1, y1, x2, y2):
-    return math.sqrt((x2 - y1) ** 2 + (y2 - y1) ** 2)
-
-# Updated function to estimate plotting time based on HPGL code
+# Estimate plotting time from the parsed moves (see plot_time.PlotTimeModel)
 def estimate_plotting_time():
-    hpgl_commands = hpgl_code.splitlines()
-    current_pos = (0, 0)
-    total_slewing_distance = 0  # Pen-up movement
-    total_drawing_distance = 0  # Pen-down movement
-    pen_down = False
-
-    for cmd in hpgl_commands:
-        if cmd.startswith('PU'):  # Pen up (slewing)
-            params = re.findall(r"[-+]?\d*\.\d+|\d+", cmd)
-            if params:
-                next_pos = (float(params[0]), float(params[1]))
-                total_slewing_distance += calculate_distance(current_pos[0], current_pos[1], next_pos[0], next_pos[1])
-                current_pos = next_pos
-            pen_down = False
-
-        elif cmd.startswith('PD'):  # Pen down (drawing)
-            pen_down = True
-
-        elif cmd.startswith('PA'):  # Absolute line to point
-            params = re.findall(r"[-+]?\d*\.\d+|\d+", cmd)
-            if params:
-                next_pos = (float(params[0]), float(params[1]))
-                if pen_down:
-                    total_drawing_distance += calculate_distance(current_pos[0], current_pos[1], next_pos[0], next_pos[1])
-                current_pos = next_pos
-
-    # Calculate time for slewing and drawing
-    slewing_time = total_slewing_distance / SLEWING_SPEED  # in seconds
-    drawing_time = total_drawing_distance / DRAWING_SPEED  # in seconds
-    total_time = slewing_time + drawing_time
-
-    # Convert to minutes and seconds
-    minutes = int(total_time // 60)
-    seconds = int(total_time % 60)
-
-    messagebox.showinfo("Plotting Time Estimate", f"Estimated plotting time: {minutes} minutes, {seconds} seconds")
-
-# Updated function to visualize HPGL commands with pen-up movements drawn first
-def visualize_hpgl(hpgl_preview_frame, pen_color_mapping):
-    global canvas_hpgl, fig_hpgl
+    estimate = PlotTimeModel.load().estimate(parse_hpgl(hpgl_code))
+    messagebox.showinfo(
+        "Plotting Time Estimate",
+        f"Estimated plotting time: {format_duration(estimate['total'])}\n\n"
+        f"Drawing {estimate['drawing_mm'] / 1000:.2f} m: {format_duration(estimate['drawing'])}\n"
+        f"Pen-up travel {estimate['slewing_mm'] / 1000:.2f} m: {format_duration(estimate['slewing'])}\n"
+        f"Pen lifts: {format_duration(estimate['pen_lifts'])}\n"
+        f"Pen changes: {format_duration(estimate['pen_changes'])}"
+    )
+
+# Fit the time model to the durations logged for finished jobs
+def calibrate_plotting_time():
+    samples = load_job_times()
+    if not samples:
+        messagebox.showerror("Error", "No finished jobs have been logged yet.")
+        return
+    model = PlotTimeModel.load()
+    error = model.calibrate(samples)
+    model.save()
+    messagebox.showinfo("Time Model Calibrated", f"Fitted to {len(samples)} jobs, mean error {error:.1f} seconds.")
+
+# Create the preview figure once; a new canvas is only made when the preview frame changes
+def setup_hpgl_canvas(hpgl_preview_frame):
+    global canvas_hpgl, fig_hpgl, ax_hpgl
     if fig_hpgl is None:
         fig_hpgl, ax_hpgl = plt.subplots()
-    else:
-        fig_hpgl.clear()
-        ax_hpgl = fig_hpgl.add_subplot(111)
+        ax_hpgl.set_title("HPGL Tool Path with Pen Colors")
+        ax_hpgl.set_aspect('equal')
+        ax_hpgl.axis('off')
+        # Pick the detail level and visible segments again whenever the view changes
+        ax_hpgl.callbacks.connect('xlim_changed', lambda ax: hpgl_view_scheduler.request())
+        ax_hpgl.callbacks.connect('ylim_changed', lambda ax: hpgl_view_scheduler.request())
+
+    widget = canvas_hpgl.get_tk_widget() if canvas_hpgl else None
+    if widget is not None and widget.winfo_exists() and widget.master is hpgl_preview_frame:
+        return
+    if widget is not None and widget.winfo_exists():
+        widget.destroy()
+    canvas_hpgl = FigureCanvasTkAgg(fig_hpgl, master=hpgl_preview_frame)
+    toolbar = NavigationToolbar2Tk(canvas_hpgl, hpgl_preview_frame, pack_toolbar=False)  # Pan and zoom
+    toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+    canvas_hpgl.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+    canvas_hpgl.mpl_connect('scroll_event', on_hpgl_scroll)
+    canvas_hpgl.mpl_connect('resize_event', lambda event: hpgl_view_scheduler.request())
 
-    # Extract Y-coordinates from the HPGL commands
-    y_coords = []
-    hpgl_commands = hpgl_code.splitlines()
+# Zoom the preview about the mouse pointer with the scroll wheel
+def on_hpgl_scroll(event):
+    if event.inaxes is not ax_hpgl:
+        return
+    factor = 1 / SCROLL_ZOOM if event.button == 'up' else SCROLL_ZOOM
+    x_min, x_max = ax_hpgl.get_xlim()
+    y_min, y_max = ax_hpgl.get_ylim()
+    ax_hpgl.set_xlim(event.xdata - (event.xdata - x_min) * factor, event.xdata + (x_max - event.xdata) * factor)
+    ax_hpgl.set_ylim(event.ydata - (event.ydata - y_min) * factor, event.ydata + (y_max - event.ydata) * factor)
+    canvas_hpgl.draw_idle()
+
+# Visualize HPGL with pen-up moves in one dashed collection under one collection per pen
+def visualize_hpgl(hpgl_preview_frame, pen_color_mapping):
+    global hpgl_lod
+    setup_hpgl_canvas(hpgl_preview_frame)
+    for collection in hpgl_collections.values():
+        collection.remove()
+    hpgl_collections.clear()
+    hpgl_lod = None
 
-    for cmd in hpgl_commands:
-        if cmd.startswith(('PU', 'PA')):  # Pen-up or Pen-down commands contain coordinates
-            params = re.findall(r"[-+]?\d*\.\d+|\d+", cmd)
-            if len(params) >= 2:  # Ensure at least two parameters are present (X, Y)
-                y_coords.append(float(params[1]))  # Append Y-coordinate
+    # Parse every move once into arrays (handles multi-coordinate PU/PD commands)
+    program = parse_hpgl(hpgl_code)
 
-    if not y_coords:
+    if not len(program):
         print("No Y-coordinates found in HPGL code.")
+        canvas_hpgl.draw_idle()
         return  # Avoid further processing if there are no coordinates
 
-    # Get the maximum Y value to flip the Y coordinates correctly
-    max_y = max(y_coords)
-
-    # Prepare lists for pen-up and pen-down movements
-    pen_up_movements = []
-    pen_down_movements = []
-    current_pos = (0, 0)
-    pen_down = False
-    current_color = 'black'  # Default color
-
-    for cmd in hpgl_commands:
-        if cmd.startswith('SP'):
-            # Pen select command (change pen)
-            pen_number = int(cmd[2])  # Extract pen number (SP1, SP2, etc.)
-            current_color = pen_color_mapping.get(pen_number, 'black')  # Get the color for the selected pen
-            print(f"Changing to pen {pen_number} with color {current_color}")
-
-        elif cmd.startswith('PU'):
-            # Pen Up: Move the pen without drawing
-            params = re.findall(r"[-+]?\d*\.\d+|\d+", cmd)
-            if len(params) >= 2:
-                next_pos = (float(params[0]), float(params[1]))
-                next_pos = (next_pos[0], max_y - next_pos[1])  # Flip the Y-coordinate
-                pen_up_movements.append((current_pos, next_pos))  # Store pen-up movement
-                current_pos = next_pos
-            pen_down = False
-
-        elif cmd.startswith('PD'):
-            # Pen Down: Start drawing
-            pen_down = True
-
-        elif cmd.startswith('PA'):
-            # Absolute line to point (either Pen Up or Pen Down)
-            params = re.findall(r"[-+]?\d*\.\d+|\d+", cmd)
-            if len(params) >= 2:
-                next_pos = (float(params[0]), float(params[1]))
-                next_pos = (next_pos[0], max_y - next_pos[1])  # Flip the Y-coordinate
-                if pen_down:
-                    pen_down_movements.append((current_pos, next_pos, current_color))  # Store pen-down movement with color
-                current_pos = next_pos
-
-    # Draw pen-up movements first (dashed blue lines)
-    for start, end in pen_up_movements:
-        ax_hpgl.plot([start[0], end[0]], [start[1], end[1]], color='lightblue', linestyle='dashed', linewidth=1)
-
-    # Draw pen-down movements next (use stroke/pen color)
-    for start, end, color in pen_down_movements:
-        ax_hpgl.plot([start[0], end[0]], [start[1], end[1]], color=color, linewidth=1)
-
-    ax_hpgl.set_title("HPGL Tool Path with Pen Colors")
-    ax_hpgl.set_aspect('equal')
-    ax_hpgl.axis('off')
-
-    if canvas_hpgl:
-        canvas_hpgl.get_tk_widget().destroy()
+    # Flip the Y coordinates about the maximum Y value
+    max_y = program.y.max()
+    segments = program.segments()
+    segments[:, :, 1] = max_y - segments[:, :, 1]
+
+    # Pen-down strokes as polylines per pen; the LOD picks what to draw for each view
+    strokes = {}
+    for pen_number, points in program.paths():
+        points[:, 1] = max_y - points[:, 1]
+        strokes.setdefault(pen_number, []).append(points)
+    hpgl_lod = ToolPathLOD(strokes, segments[~program.pen_down])
+
+    # Pen-up movements first (dashed blue lines), then pen-down movements in pen colors
+    hpgl_collections['pen_up'] = LineCollection([], colors='lightblue', linestyles='dashed', linewidths=1)
+    for pen_number in sorted(strokes):
+        color = pen_color_mapping.get(pen_number, 'black')  # Get the color for the selected pen
+        hpgl_collections[pen_number] = LineCollection([], colors=color, linewidths=1)
+    for collection in hpgl_collections.values():
+        ax_hpgl.add_collection(collection)
+
+    # Collections do not autoscale; fit the view to the job
+    min_x, min_y, max_x, max_y = hpgl_lod.bounds
+    margin = hpgl_lod.extent * 0.02
+    ax_hpgl.set_xlim(min_x - margin, max_x + margin)
+    ax_hpgl.set_ylim(min_y - margin, max_y + margin)
+    hpgl_view_scheduler.flush()
+
+# Fill the preview collections with the detail level and segments the current view needs
+def refresh_hpgl_view():
+    if hpgl_lod is None or canvas_hpgl is None:
+        return
+    x_min, x_max = ax_hpgl.get_xlim()
+    y_min, y_max = ax_hpgl.get_ylim()
+    extent = ax_hpgl.get_window_extent()
+    pixel_size = max((x_max - x_min) / max(extent.width, 1), (y_max - y_min) / max(extent.height, 1))
+
+    _, strokes, pen_up = hpgl_lod.visible((x_min, y_min, x_max, y_max), pixel_size)
+    hpgl_collections['pen_up'].set_segments(pen_up)
+    for pen_number, pen_strokes in strokes.items():
+        hpgl_collections[pen_number].set_segments(pen_strokes)
+    canvas_hpgl.draw_idle()
+
+# Simulation window: plays the job back against the time model with a scrub bar
+def open_simulation_window(parent):
+    program = parse_hpgl(hpgl_code)
+    if not len(program):
+        messagebox.showerror("Error", "No HPGL code to simulate.")
+        return
 
-    canvas_hpgl = FigureCanvasTkAgg(fig_hpgl, master=hpgl_preview_frame)
-    canvas_hpgl.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
-    canvas_hpgl.draw()
+    timeline = PlotTimeline(program, PlotTimeModel.load())
+    # Same orientation as the preview: Y flipped about the maximum Y value
+    segments = program.segments()
+    segments[:, :, 1] = program.y.max() - segments[:, :, 1]
+    colors = [pen_color_mapping.get(int(pen_number), 'black') for pen_number in program.pen]
+
+    sim_window = tk.Toplevel(parent)
+    sim_window.title("Plot Simulation")
+
+    fig_sim, ax_sim = plt.subplots()
+    ax_sim.set_aspect('equal')
+    ax_sim.axis('off')
+    points = segments.reshape(-1, 2)
+    (min_x, min_y), (max_x, max_y) = points.min(axis=0), points.max(axis=0)
+    margin = max(max_x - min_x, max_y - min_y, 1) * 0.02
+    ax_sim.set_xlim(min_x - margin, max_x + margin)
+    ax_sim.set_ylim(min_y - margin, max_y + margin)
+
+    canvas_sim = FigureCanvasTkAgg(fig_sim, master=sim_window)
+    canvas_sim.get_tk_widget().grid(row=0, column=0, columnspan=4, sticky="nsew")
+    simulation = PlotSimulation(ax_sim, canvas_sim, timeline, segments, program.pen_down, colors)
+    canvas_sim.mpl_connect('resize_event', lambda event: simulation.seek(simulation.time))
+
+    state = {'playing': False, 'last': None, 'updating': False}
+    time_var = tk.StringVar(sim_window)
+    speed_var = tk.StringVar(sim_window, value=SIMULATION_SPEEDS[1])
+
+    def show_time():
+        time_var.set(f"{format_duration(simulation.time)} / {format_duration(timeline.total)}")
+        state['updating'] = True  # Moving the scale must not count as a scrub
+        scrub_scale.set(simulation.time)
+        state['updating'] = False
+
+    def on_scrub(value):
+        if not state['updating']:
+            simulation.seek(float(value))
+            time_var.set(f"{format_duration(simulation.time)} / {format_duration(timeline.total)}")
+
+    def toggle_play():
+        state['playing'] = not state['playing']
+        if state['playing'] and simulation.time >= timeline.total:
+            simulation.seek(0.0)
+        state['last'] = time.perf_counter()
+        play_button.config(text="Pause" if state['playing'] else "Play")
+
+    def tick():
+        if not sim_window.winfo_exists():
+            return
+        if state['playing']:
+            now = time.perf_counter()
+            speed = float(speed_var.get().rstrip('x'))
+            simulation.advance(simulation.time + (now - state['last']) * speed)
+            state['last'] = now
+            show_time()
+            if simulation.time >= timeline.total:
+                toggle_play()
+        sim_window.after(SIMULATION_FRAME_MS, tick)
+
+    play_button = ttk.Button(sim_window, text="Play", command=toggle_play)
+    play_button.grid(row=1, column=0, padx=10, pady=5)
+    ttk.Combobox(sim_window, values=SIMULATION_SPEEDS, textvariable=speed_var, width=6, state="readonly").grid(row=1, column=1, padx=10, pady=5)
+    scrub_scale = ttk.Scale(sim_window, from_=0, to=max(timeline.total, 0.001), orient=tk.HORIZONTAL, length=400, command=on_scrub)
+    scrub_scale.grid(row=1, column=2, padx=10, pady=5, sticky="ew")
+    ttk.Label(sim_window, textvariable=time_var, width=14).grid(row=1, column=3, padx=10, pady=5)
+
+    sim_window.columnconfigure(2, weight=1)
+    sim_window.rowconfigure(0, weight=1)
+    sim_window.protocol("WM_DELETE_WINDOW", lambda: [plt.close(fig_sim), sim_window.destroy()])
+
+    simulation.seek(0.0)
+    show_time()
+    tick()
 
 # Main function to open the tool path window
-def open_tool_path_window(root):
+def open_tool_path_window(root, get_layer_properties=None):
     new_window = tk.Toplevel(root)
+    init_tool_settings(new_window)
     new_window.title("SVG and HPGL Toolpath Previewer with Time Estimate")
 
     # Create layout for the new window
@@ -434,14 +509,46 @@ def open_tool_path_window(root):
     load_button = ttk.Button(frame, text="Convert and Preview HPGL", command=lambda: [convert_svg_to_hpgl(), visualize_hpgl(hpgl_preview_frame, pen_color_mapping)])
     load_button.grid(row=0, column=0, padx=10, pady=5)
 
+    # Button to convert the design layers directly (no SVG round-trip)
+    if get_layer_properties is not None:
+        design_button = ttk.Button(frame, text="Convert Design to HPGL", command=lambda: [convert_design_to_hpgl(get_layer_properties()), visualize_hpgl(hpgl_preview_frame, pen_color_mapping)])
+        design_button.grid(row=0, column=3, padx=10, pady=5)
+
     # Button to estimate plotting time
     time_button = ttk.Button(frame, text="Estimate Plotting Time", command=estimate_plotting_time)
     time_button.grid(row=0, column=1, padx=10, pady=5)
+    calibrate_button = ttk.Button(frame, text="Calibrate Time Model", command=calibrate_plotting_time)
+    calibrate_button.grid(row=0, column=11, padx=10, pady=5)
+    simulate_button = ttk.Button(frame, text="Simulate Plot", command=lambda: open_simulation_window(new_window))
+    simulate_button.grid(row=0, column=12, padx=10, pady=5)
 
     # Add a checkbox to toggle whether to include the border or ignore it
     border_checkbox = ttk.Checkbutton(frame, text="Include Border", variable=include_border)
     border_checkbox.grid(row=0, column=2, padx=10, pady=5)
 
+    # Add a checkbox to toggle the pen-up travel optimizer
+    optimize_checkbox = ttk.Checkbutton(frame, text="Optimize Travel", variable=optimize_travel)
+    optimize_checkbox.grid(row=0, column=5, padx=10, pady=5)
+
+    # Curve flattening tolerance (plotter units, 1 unit = 0.025 mm)
+    ttk.Label(frame, text="Curve Tolerance").grid(row=0, column=6, padx=10, pady=5)
+    tolerance_spinbox = ttk.Spinbox(frame, from_=0.25, to=20, increment=0.25, width=6, textvariable=flatten_tolerance)
+    tolerance_spinbox.grid(row=0, column=7, padx=10, pady=5)
+
+    # Simplification tolerance (plotter units, 0 disables)
+    ttk.Label(frame, text="Simplify Tolerance").grid(row=0, column=8, padx=10, pady=5)
+    simplify_spinbox = ttk.Spinbox(frame, from_=0, to=20, increment=0.5, width=6, textvariable=simplify_tolerance)
+    simplify_spinbox.grid(row=0, column=9, padx=10, pady=5)
+
+    # Add a checkbox to toggle command packing
+    pack_checkbox = ttk.Checkbutton(frame, text="Pack Commands", variable=pack_commands)
+    pack_checkbox.grid(row=0, column=10, padx=10, pady=5)
+
+    # Worker processes for large SVG conversions (smaller files and 1 worker convert in-process)
+    ttk.Label(frame, text="Workers").grid(row=0, column=13, padx=10, pady=5)
+    workers_spinbox = ttk.Spinbox(frame, from_=1, to=64, increment=1, width=4, textvariable=conversion_workers)
+    workers_spinbox.grid(row=0, column=14, padx=10, pady=5)
+
     # Frame for HPGL toolpath preview
     global hpgl_preview_frame
     hpgl_preview_frame = ttk.Frame(new_window, padding="10")
@@ -459,10 +566,13 @@ def open_tool_path_window(root):
 
     select_button = ttk.Button(frame, text="Select SVG and Convert", command=select_svg_and_convert)
     select_button.grid(row=0, column=4, padx=10, pady=5)
+    clean_button = ttk.Button(frame, text="Clean SVG...", command=select_svg_and_clean)
+    clean_button.grid(row=0, column=15, padx=10, pady=5)
 
 # Serial Port Testing Module
 def open_serial_port_window(root):
     serial_window = tk.Toplevel(root)
+    init_tool_settings(serial_window)
     serial_window.title("Serial Port Testing Tool")
 
     # Create layout for the serial tool window
@@ -482,6 +592,18 @@ def open_serial_port_window(root):
     baud_rate_dropdown.grid(row=1, column=1, padx=10, pady=5)
     baud_rate_dropdown.set("9600")  # Set default baud rate
 
+    # Handshake used when streaming a job (buffer polling, XON/XOFF or RTS/CTS)
+    handshake_label = ttk.Label(frame, text="Handshake:")
+    handshake_label.grid(row=6, column=0, padx=10, pady=5)
+    handshake_dropdown = ttk.Combobox(frame, values=HANDSHAKES, textvariable=plotter_handshake, state="readonly")
+    handshake_dropdown.grid(row=6, column=1, padx=10, pady=5)
+
+    # Job queue over several plotters
+    queue_button = ttk.Button(frame, text="Plot Queue...", command=lambda: open_plot_queue_window(serial_window))
+    queue_button.grid(row=7, column=0, columnspan=2, padx=10, pady=5)
+    file_button = ttk.Button(frame, text="Plot HPGL File...", command=lambda: send_hpgl_file(serial_window))
+    file_button.grid(row=8, column=0, columnspan=2, padx=10, pady=5)
+
     # Connect button
     connect_button = ttk.Button(frame, text="Connect", command=lambda: connect_to_plotter(serial_port_dropdown.get(), baud_rate_dropdown.get()))
     connect_button.grid(row=2, column=0, columnspan=2, padx=10, pady=5)
@@ -497,14 +619,156 @@ def open_serial_port_window(root):
     serial_window.columnconfigure(0, weight=1)
     serial_window.rowconfigure(1, weight=1)
 
+# Plot queue window: pick the plotter pool, queue jobs and watch throughput
+def open_plot_queue_window(parent):
+    queue_window = tk.Toplevel(parent)
+    init_tool_settings(queue_window)
+    queue_window.title("Plot Queue")
+
+    frame = ttk.Frame(queue_window, padding="10")
+    frame.grid(row=0, column=0, sticky="nsew")
+
+    ttk.Label(frame, text="Plotter Ports:").grid(row=0, column=0, padx=10, pady=5)
+    port_listbox = tk.Listbox(frame, selectmode=tk.MULTIPLE, height=5, exportselection=False)
+    for port in available_ports:
+        port_listbox.insert(tk.END, port)
+    port_listbox.grid(row=0, column=1, padx=10, pady=5)
+
+    ttk.Label(frame, text="Baud Rate:").grid(row=1, column=0, padx=10, pady=5)
+    baud_rate_dropdown = ttk.Combobox(frame, values=baud_rates)
+    baud_rate_dropdown.grid(row=1, column=1, padx=10, pady=5)
+    baud_rate_dropdown.set("9600")
+
+    status_var = tk.StringVar(queue_window, value="Queue not started.")
+    ttk.Label(frame, textvariable=status_var, width=60).grid(row=3, column=0, columnspan=2, padx=10, pady=5)
+    device_listbox = tk.Listbox(frame, width=70, height=5, exportselection=False)
+    device_listbox.grid(row=4, column=0, columnspan=2, padx=10, pady=5)
+    job_listbox = tk.Listbox(frame, width=70, height=8, exportselection=False)
+    job_listbox.grid(row=6, column=0, columnspan=2, padx=10, pady=5)
+    shown_jobs = []  # Jobs in job_listbox order
+
+    def start_pool():
+        global plot_queue
+        ports = [port_listbox.get(i) for i in port_listbox.curselection()]
+        if not ports:
+            messagebox.showerror("Error", "Select at least one plotter port.")
+            return
+        moved_jobs = []
+        if plot_queue is not None:
+            # The old pool must let go of its ports before the new one opens them
+            running = [device.current_job for device in plot_queue.devices if device.current_job is not None]
+            if running and not messagebox.askyesno(
+                    "Restart Pool", f"{len(running)} job(s) are plotting. Cancel them and restart the pool?\n"
+                                    "They keep their progress and are queued again."):
+                return
+            plot_queue.stop(cancel_running=True)
+            plot_queue.join()
+            moved_jobs = plot_queue.take_queued() + [job for job in running if job.state == 'cancelled']
+        devices = [PlotterDevice(port, baud_rate_dropdown.get(), plotter_handshake.get()) for port in ports]
+        plot_queue = PlotQueue(devices)
+        plot_queue.add_jobs(moved_jobs)
+        plot_queue.start()
+        if moved_jobs:
+            messagebox.showinfo("Plot Queue", f"Moved {len(moved_jobs)} waiting job(s) to the new pool.")
+
+    def selected_job():
+        selection = job_listbox.curselection()
+        return shown_jobs[selection[0]] if selection and selection[0] < len(shown_jobs) else None
+
+    def cancel_job():
+        job = selected_job()
+        if plot_queue is not None and job is not None:
+            plot_queue.cancel(job)
+
+    def retry_job():
+        job = selected_job()
+        if plot_queue is not None and job is not None and not plot_queue.retry(job):
+            messagebox.showerror("Error", "Only failed or cancelled jobs can be retried.")
+
+    def reset_device():
+        selection = device_listbox.curselection()
+        if plot_queue is not None and selection and selection[0] < len(plot_queue.devices):
+            plot_queue.devices[selection[0]].reset()
+
+    def queue_current_job():
+        if plot_queue is None:
+            messagebox.showerror("Error", "Start the plotter pool first.")
+            return
+        if not hpgl_code.strip():
+            messagebox.showerror("Error", "No HPGL code to queue.")
+            return
+        plot_queue.submit(hpgl_code, os.path.basename(current_svg))
+
+    ttk.Button(frame, text="Start Pool", command=start_pool).grid(row=2, column=0, padx=10, pady=5)
+    ttk.Button(frame, text="Queue Current Job", command=queue_current_job).grid(row=2, column=1, padx=10, pady=5)
+    ttk.Button(frame, text="Reset Device", command=reset_device).grid(row=5, column=0, padx=10, pady=5)
+    ttk.Button(frame, text="Cancel Job", command=cancel_job).grid(row=7, column=0, padx=10, pady=5)
+    ttk.Button(frame, text="Retry Job", command=retry_job).grid(row=7, column=1, padx=10, pady=5)
+
+    def refill(listbox, lines):
+        # Rewrite the rows without losing the user's selection
+        selection = listbox.curselection()
+        listbox.delete(0, tk.END)
+        for line in lines:
+            listbox.insert(tk.END, line)
+        for index in selection:
+            if index < len(lines):
+                listbox.selection_set(index)
+
+    def poll():
+        if not queue_window.winfo_exists():
+            return
+        if plot_queue is not None:
+            stats = plot_queue.stats()
+            status_var.set(
+                f"Queued {stats['queue_depth']}, running {stats['running']}, done {stats['finished']}, "
+                f"failed {stats['failed']} - {stats['jobs_per_hour']:.1f} jobs/hour"
+            )
+            device_lines = []
+            for device in stats['devices']:
+                line = f"{device['port']}: {device['state']}, {device['utilization']:.0%} busy, {device['jobs_done']} done"
+                if device['job']:
+                    line += f", plotting {device['job']}"
+                if device['error']:
+                    line += f", {device['error']}"
+                device_lines.append(line)
+            refill(device_listbox, device_lines)
+
+            shown_jobs[:] = list(plot_queue.jobs)
+            job_lines = []
+            for job in shown_jobs:
+                line = f"{job.name}: {job.state}"
+                if job.device is not None and job.state == 'running':
+                    line += f" on {job.device.port}"
+                if job.error:
+                    line += f", {job.error}"
+                job_lines.append(line)
+            refill(job_listbox, job_lines)
+            if stats['queue_depth'] and all(device['state'] == 'error' for device in stats['devices']):
+                status_var.set(status_var.get() + " - every plotter is in error, reset one to continue")
+        queue_window.after(500, poll)
+
+    poll()
+
 def select_svg_and_convert():
     global current_svg
     file_path = filedialog.askopenfilename(
         title="Select SVG File",
-        filetypes=[("SVG files", "*.svg")]
+        filetypes=[("SVG files", "*.svg *.svgz")]
     )
     if file_path:
         current_svg = file_path
         convert_svg_to_hpgl()
         visualize_hpgl(hpgl_preview_frame, pen_color_mapping)
 
+# Strip clipPath rectangles (e.g. from matplotlib exports) from an SVG file, in place
+def select_svg_and_clean():
+    file_path = filedialog.askopenfilename(
+        title="Select SVG File to Clean",
+        filetypes=[("SVG files", "*.svg *.svgz")]
+    )
+    if file_path:
+        if clean_svg_file(file_path):
+            messagebox.showinfo("Clean SVG", f"Removed clipPath rectangles from {os.path.basename(file_path)}.")
+        else:
+            messagebox.showinfo("Clean SVG", "No clipPath rectangles found.")